@@ -1,6 +1,103 @@
+import hashlib
+from collections import Counter
 import streamlit as st
-from src.helper import extract_text_from_pdf, ask_gemini
-from src.job_api import fetch_linkedin_jobs, fetch_naukri_jobs
+from src.helper import extract_text_from_pdf
+from src.analysis import KEYWORDS_USE_LLM, generate_job_keywords, stream_resume_analysis
+from src.ranking import rank_jobs
+from src.skills import skill_gaps
+from src.dedup import Deduplicator
+from src.resilience import deadline
+from src.metrics import gemini_cost, summarize_spans, trace
+from src.prefetch import PREFETCH_ENABLED, prefetch_scheduler
+from src.query_planner import fetch_planned_jobs, plan_runs
+
+# Display name and section heading per job source
+SOURCE_DISPLAY = {
+    "linkedin": ("LinkedIn", "💼 LinkedIn Jobs"),
+    "naukri": ("Naukri", "💼 Naukri Jobs (India)"),
+}
+
+
+def source_display(source):
+    return SOURCE_DISPLAY.get(source, (source.title(), f"💼 {source.title()} Jobs"))
+
+
+# Choices for how many postings the job table shows per page
+PAGE_SIZES = (25, 50, 100, 250)
+SORT_COLUMNS = {"Best match": ("match", True), "Newest": ("posted", True),
+                "Company": ("company", False), "Title": ("title", False)}
+
+
+def job_rows(jobs_by_source, resume_text):
+    """One table row per posting, ranked against the resume across all sources"""
+    jobs = [job for source_jobs in jobs_by_source.values() for job in source_jobs]
+    rows = []
+    for ranked in rank_jobs(resume_text, jobs, top_k=len(jobs)):
+        job = ranked["job"]
+        rows.append({
+            "match": ranked["score"],
+            "title": job.title,
+            "company": job.company,
+            "location": job.location,
+            "source": ", ".join(source_display(source)[0] for source in job.sources or [job.source]),
+            "skills": ", ".join(ranked["matched_skills"] or ranked["matched_terms"]),
+            "missing": ", ".join(ranked["missing_skills"]),
+            "posted": job.posted_at,
+            "url": job.url,
+        })
+    return rows
+
+
+def job_table(rows, **kwargs):
+    """All rows as a single dataframe element (sortable by column header in the browser)"""
+    top_score = max((row["match"] for row in rows), default=0) or 1
+    st.dataframe(rows, hide_index=True, width="stretch", column_config={
+        "match": st.column_config.ProgressColumn("Match", min_value=0, max_value=top_score, format="%.2f"),
+        "title": "Title",
+        "company": "Company",
+        "location": "Location",
+        "source": "Source",
+        "skills": "Matched skills",
+        "missing": "Missing skills",
+        "posted": "Posted",
+        "url": st.column_config.LinkColumn("Link", display_text="View Job"),
+    }, **kwargs)
+
+
+def render_jobs(rows, counts):
+    """Filterable, paginated job table; counts maps source -> postings it returned"""
+    for source, count in counts.items():
+        if not count:
+            st.warning(f"No {source_display(source)[0]} jobs found.")
+    if not rows:
+        return
+
+    sources = sorted({name for row in rows for name in row["source"].split(", ")})
+    locations = [location for location, _ in Counter(row["location"] for row in rows if row["location"]).most_common()]
+    col1, col2, col3 = st.columns([2, 3, 1])
+    picked_sources = col1.multiselect("Source", sources, placeholder="All sources")
+    picked_locations = col2.multiselect("Location", locations, placeholder="All locations")
+    sort_by = col3.selectbox("Sort by", list(SORT_COLUMNS))
+
+    if picked_sources:
+        rows = [row for row in rows if any(name in picked_sources for name in row["source"].split(", "))]
+    if picked_locations:
+        rows = [row for row in rows if row["location"] in picked_locations]
+    column, descending = SORT_COLUMNS[sort_by]
+    rows = sorted(rows, key=lambda row: row[column], reverse=descending)
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    page_size = col1.selectbox("Per page", PAGE_SIZES)
+    pages = max(1, -(-len(rows) // page_size))
+    page = col2.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+    start = (page - 1) * page_size
+    col3.caption(f"Showing {min(start + 1, len(rows))}–{min(start + page_size, len(rows))} of {len(rows)} jobs")
+    job_table(rows[start:start + page_size])
+
+
+# Opt-in: popular searches are refreshed in the background for this process
+if PREFETCH_ENABLED:
+    prefetch_scheduler.start()
 
 # ---------------- Page Config ----------------
 st.set_page_config(
@@ -18,20 +115,6 @@ st.markdown("""
     border-radius: 12px;
     margin-bottom: 15px;
 }
-.job-card {
-    background-color: #111827;
-    padding: 16px;
-    border-radius: 10px;
-    margin-bottom: 12px;
-}
-.tag {
-    display: inline-block;
-    background-color: #2563eb;
-    padding: 4px 10px;
-    border-radius: 20px;
-    margin: 4px;
-    font-size: 12px;
-}
 </style>
 """, unsafe_allow_html=True)
 
@@ -43,6 +126,7 @@ with st.sidebar:
         type=["pdf"]
     )
     st.info("AI-powered resume analysis & job matching")
+    refine_keywords = st.checkbox("✨ Refine search keywords with Gemini", value=KEYWORDS_USE_LLM)
 
 # ---------------- Main Title ----------------
 st.title("💼 AI Job Recommender")
@@ -50,124 +134,99 @@ st.caption("Upload your resume → Get insights → Find jobs from LinkedIn & Na
 
 # ---------------- Resume Processing ----------------
 if uploaded_file:
-    with st.spinner("🔍 Extracting resume text..."):
-        resume_text = extract_text_from_pdf(uploaded_file)
-
-    with st.spinner("🧠 Analyzing resume..."):
-        summary = ask_gemini(
-            f"""
-You are an experienced technical recruiter.
-
-Summarize the resume below in clear bullet points with:
-- Core Skills
-- Education
-- Work Experience
-- Tools & Technologies
-
-Resume:
-{resume_text}
-""",
-            max_tokens=500
-        )
-
-    with st.spinner("🛠 Identifying skill gaps..."):
-        skill_gaps = ask_gemini(
-            f"""
-You are a career mentor.
-
-Analyze the resume and list:
-- Missing skills
-- Certifications needed
-- Experience gaps
-- Improvement suggestions
-
-Resume:
-{resume_text}
-""",
-            max_tokens=500
-        )
-
-    with st.spinner("🚀 Building career roadmap..."):
-        roadmap = ask_gemini(
-            f"""
-You are a senior career advisor.
-
-Create a 6–12 month roadmap including:
-- Skills
-- Certifications
-- Projects
-- Job roles
-
-Resume:
-{resume_text}
-""",
-            max_tokens=400
-        )
+    # Streamlit reruns this script on every interaction, so each pipeline stage
+    # runs once per uploaded file (keyed on its content hash) and is reused after
+    file_bytes = uploaded_file.getvalue()
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
+    if st.session_state.get("resume_hash") != file_hash:
+        st.session_state.resume_hash = file_hash
+        st.session_state.pipeline = {}
+    pipeline = st.session_state.pipeline
+    # Timing spans of every stage run for this resume, for the sidebar breakdown
+    spans = pipeline.setdefault("spans", [])
+
+    if "resume_text" not in pipeline:
+        with st.spinner("🔍 Extracting resume text..."), trace(spans):
+            pipeline["resume_text"] = extract_text_from_pdf(file_bytes)
+    resume_text = pipeline["resume_text"]
 
     # ---------------- Results ----------------
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("📑 Resume Summary")
-        st.markdown(f"<div class='card'>{summary}</div>", unsafe_allow_html=True)
+        summary_box = st.empty()
 
     with col2:
         st.subheader("🛠 Skill Gaps")
-        print(skill_gaps)
-        st.markdown(f"<div class='card'>{skill_gaps}</div>", unsafe_allow_html=True)
+        skill_gaps_box = st.empty()
 
     st.subheader("🚀 Career Roadmap")
-    st.markdown(f"<div>{roadmap}</div>", unsafe_allow_html=True)
+    roadmap_box = st.empty()
+
+    def show_analysis(sections):
+        summary_box.markdown(f"<div class='card'>{sections.get('summary', '')}</div>", unsafe_allow_html=True)
+        skill_gaps_box.markdown(f"<div class='card'>{sections.get('skill_gaps', '')}</div>", unsafe_allow_html=True)
+        roadmap_box.markdown(f"<div>{sections.get('roadmap', '')}</div>", unsafe_allow_html=True)
+
+    if "analysis" not in pipeline:
+        # Render each section as its tokens arrive instead of waiting for the whole response
+        with st.spinner("🧠 Analyzing resume..."), deadline(), trace(spans):
+            for sections in stream_resume_analysis(resume_text):
+                show_analysis(sections)
+        pipeline["analysis"] = sections
+    show_analysis(pipeline["analysis"])
 
     st.success("✅ Resume analysis completed!")
 
     # ---------------- Job Recommendation ----------------
-    if st.button("🔍 Get Job Recommendations"):
-        with st.spinner("📌 Generating job keywords..."):
-            keywords = ask_gemini(
-                f"""
-Extract best job titles and keywords from below summary.
-Return only comma-separated values.
-
-Summary:
-{summary}
-""",
-                max_tokens=100
-            )
-
-        search_keywords = keywords.replace("\n", "").strip()
-        st.success(f"🔑 Keywords: {search_keywords}")
-
-        with st.spinner("🌐 Fetching jobs..."):
-            linkedin_jobs = fetch_linkedin_jobs(search_keywords, rows=40)
-            naukri_jobs = fetch_naukri_jobs(search_keywords, rows=40)
-
-        # ---------------- LinkedIn Jobs ----------------
-        st.subheader("💼 LinkedIn Jobs")
-        if linkedin_jobs:
-            for job in linkedin_jobs:
-                st.markdown(f"""
-                <div class="job-card">
-                    <b>{job.get('title')}</b><br>
-                    {job.get('companyName')}<br>
-                    📍 {job.get('location')}<br>
-                    🔗 <a href="{job.get('link')}" target="_blank">View Job</a>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.warning("No LinkedIn jobs found.")
-
-        # ---------------- Naukri Jobs ----------------
-        st.subheader("💼 Naukri Jobs (India)")
-        if naukri_jobs:
-            for job in naukri_jobs:
-                st.markdown(f"""
-                <div class="job-card">
-                    <b>{job.get('title')}</b><br>
-                    {job.get('companyName')}<br>
-                    📍 {job.get('location')}<br>
-                    🔗 <a href="{job.get('url')}" target="_blank">View Job</a>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.warning("No Naukri jobs found.")
+    if st.button("🔍 Get Job Recommendations") and "jobs" not in pipeline:
+        if "keywords" not in pipeline:
+            # Titles and skills matched locally in the resume; Gemini only refines them when asked to
+            with st.spinner("📌 Generating job keywords..."), deadline(), trace(spans):
+                pipeline["keywords"] = generate_job_keywords(resume_text, use_llm=refine_keywords)
+
+        # Each distinct keyword is its own search per source, within the per-request run budget
+        runs = plan_runs(pipeline["keywords"], rows=40)
+        pipeline["queries"] = list(dict.fromkeys(query for _, query, _ in runs))
+
+        # One table for every search, refreshed as each actor finishes
+        preview = st.empty()
+        preview.info("⏳ Fetching jobs...")
+
+        # The same posting often comes back from several sources and searches; show it once
+        deduplicator = Deduplicator()
+        jobs_by_source = {source: [] for source, _, _ in runs}
+        rows = []
+        # All runs share one time budget; a run that goes past it falls back to cached results
+        with deadline(), trace(spans):
+            for done, (source, _, jobs) in enumerate(fetch_planned_jobs(runs), 1):
+                jobs_by_source[source].extend(deduplicator.add(source, jobs))
+                rows = job_rows(jobs_by_source, resume_text)
+                with preview.container():
+                    st.caption(f"⏳ {done} of {len(runs)} searches done")
+                    job_table(rows, height=400)
+        preview.empty()
+        pipeline["jobs"] = jobs_by_source
+        pipeline["job_rows"] = rows
+        pipeline["market_gaps"] = skill_gaps(resume_text, [job for jobs in jobs_by_source.values() for job in jobs])
+
+    if "jobs" in pipeline:
+        st.success(f"🔑 Searched: {' · '.join(pipeline['queries'])}")
+        st.subheader("💼 Job Recommendations")
+        # Ranked once per fetch; filtering and paging only rerun on the cached rows
+        render_jobs(pipeline["job_rows"], {source: len(jobs) for source, jobs in pipeline["jobs"].items()})
+        if pipeline["market_gaps"]:
+            st.caption("🧩 Asked for in these jobs but not on your resume: " + ", ".join(
+                f"{gap['skill']} ({gap['jobs']})" for gap in pipeline["market_gaps"]))
+
+    # ---------------- Run Breakdown ----------------
+    with st.sidebar:
+        st.subheader("⏱ Run Breakdown")
+        rows = summarize_spans(spans)
+        if rows:
+            st.dataframe(rows, hide_index=True, width="stretch")
+            input_tokens = sum(row.get("input_tokens", 0) for row in rows)
+            output_tokens = sum(row.get("output_tokens", 0) for row in rows)
+            st.caption(f"Gemini: {input_tokens} input / {output_tokens} output tokens "
+                       f"(~${gemini_cost(input_tokens, output_tokens):.4f})")
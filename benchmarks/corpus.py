@@ -0,0 +1,60 @@
+"""Seeded generator of synthetic resume PDFs for extraction and pipeline benchmarks."""
+import random
+
+from benchmarks.fakes import CITIES, COMPANIES, TITLES, WORDS
+
+_NAMES = ("Aarav", "Diya", "Kabir", "Meera", "Rohan", "Saanvi", "Vihaan", "Anaya", "Arjun", "Isha")
+_LINES_PER_PAGE = 48
+
+
+def _resume_lines(rng, pages):
+    lines = [
+        f"{rng.choice(_NAMES)} {rng.choice(_NAMES)}son",
+        f"{rng.choice(TITLES)} | {rng.choice(CITIES)}, India | candidate@example.com",
+        "",
+        "SUMMARY",
+        " ".join(rng.choices(WORDS, k=40)),
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(WORDS, 15)),
+        "",
+        "EXPERIENCE",
+    ]
+    while len(lines) < pages * _LINES_PER_PAGE - 8:
+        lines += [
+            f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} ({rng.randint(2012, 2024)} - present)",
+            *(f"- {' '.join(rng.choices(WORDS, k=12))}" for _ in range(rng.randint(3, 6))),
+            "",
+        ]
+    lines += ["EDUCATION", "B.Tech in Computer Science, 2012", "", "CERTIFICATIONS",
+              ", ".join(rng.sample(WORDS, 4))]
+    return lines
+
+
+def generate_resume(seed, pages=2):
+    """PDF bytes for one synthetic resume, with a repeated header and page-number footer on every page"""
+    import fitz  # PyMuPDF
+
+    rng = random.Random(seed)
+    lines = _resume_lines(rng, pages)
+    doc = fitz.open()
+    total = -(-len(lines) // _LINES_PER_PAGE)
+    for number in range(total):
+        page = doc.new_page()
+        body = lines[number * _LINES_PER_PAGE:(number + 1) * _LINES_PER_PAGE]
+        page.insert_text((50, 30), "Curriculum Vitae - Confidential", fontsize=8)
+        page.insert_text((50, 60), "\n".join(body), fontsize=9)
+        page.insert_text((280, 820), f"Page {number + 1} of {total}", fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def generate_corpus(count=20, min_pages=1, max_pages=6, seed=0):
+    """List of (pages, pdf_bytes) for `count` resumes of varying length"""
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(count):
+        pages = rng.randint(min_pages, max_pages)
+        corpus.append((pages, generate_resume(seed * 100003 + index, pages)))
+    return corpus
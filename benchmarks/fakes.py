@@ -0,0 +1,366 @@
+"""
+Local stand-ins for the Apify and Gemini HTTP APIs, for offline benchmarks.
+
+Both speak just enough of the real wire protocol for apify-client and
+google-genai to work unchanged when pointed at them with APIFY_API_URL and
+GEMINI_BASE_URL. Latency, slow-tail rate, failure rate and payload sizes are
+configurable, and all generated data is seeded so runs are comparable.
+
+Serve both on fixed ports (e.g. to click through app.py against them):
+
+    python benchmarks/fakes.py --apify-port 8701 --gemini-port 8702
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = (
+    "python django flask fastapi aws azure gcp docker kubernetes terraform sql postgres mongodb "
+    "redis kafka spark airflow pandas numpy pytorch tensorflow react typescript node java spring "
+    "golang rust microservices rest graphql ci cd linux git agile scrum testing security analytics "
+    "design leadership communication mentoring stakeholder delivery ownership scalable reliable"
+).split()
+TITLES = ("Python Developer", "Backend Engineer", "Data Engineer", "Machine Learning Engineer",
+          "Full Stack Developer", "DevOps Engineer", "Software Engineer", "Data Analyst")
+COMPANIES = ("Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises",
+             "Wonka Labs", "Cyberdyne", "Soylent")
+CITIES = ("Bangalore", "Hyderabad", "Pune", "Chennai", "Mumbai", "Delhi", "Gurgaon", "Noida", "Remote")
+
+# Raw field names per source, mirroring src/records.py FIELD_MAP (first name wins)
+SOURCE_FIELDS = {
+    "linkedin": {"title": "title", "company": "companyName", "location": "location", "url": "link",
+                 "description": "descriptionText", "skills": "skills", "posted_at": "postedAt"},
+    "naukri": {"title": "title", "company": "companyName", "location": "location", "url": "jdURL",
+               "description": "jobDescription", "skills": "tagsAndSkills", "posted_at": "createdDate"},
+}
+
+
+@dataclass
+class FakeConfig:
+    latency: float = 0.02  # seconds added to every request
+    jitter: float = 0.5  # +/- fraction of latency
+    slow_rate: float = 0.0  # fraction of requests that take slow_latency instead
+    slow_latency: float = 2.0
+    failure_rate: float = 0.0  # fraction of requests answered with 503
+    seed: int = 0
+
+    def delay(self, rng):
+        if self.slow_rate and rng.random() < self.slow_rate:
+            return self.slow_latency
+        return max(0.0, rng.uniform(self.latency * (1 - self.jitter), self.latency * (1 + self.jitter)))
+
+
+def _text(rng, chars):
+    words = []
+    size = 0
+    while size < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        data = self.rfile.read(length)
+        # apify-client gzips request bodies
+        if self.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        return json.loads(data or b"{}")
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = self._body() if method == "POST" else {}
+        rng = self.fake.request_rng()
+        time.sleep(self.fake.config.delay(rng))
+        if self.fake.config.failure_rate and rng.random() < self.fake.config.failure_rate:
+            self.fake.count("failures")
+            return self._send_json({"error": {"code": 503, "message": "Injected failure", "status": "UNAVAILABLE",
+                                              "type": "fake-overload"}}, status=503)
+        try:
+            self.fake.route(self, method, url.path, query, body)
+        except KeyError:
+            self._send_json({"error": {"code": 404, "message": f"Not found: {url.path}", "status": "NOT_FOUND",
+                                       "type": "record-not-found"}}, status=404)
+        except Exception as exc:
+            self._send_json({"error": {"code": 500, "message": repr(exc), "status": "INTERNAL",
+                                       "type": "internal-error"}}, status=500)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class _FakeServer:
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or FakeConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "failures": 0}
+        handler = type(f"{type(self).__name__}Handler", (_Handler,), {"fake": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def request_rng(self):
+        with self._lock:
+            self.counters["requests"] += 1
+            return random.Random(self._rng.random())
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeApify(_FakeServer):
+    """
+    Apify API v2 subset: start an actor run, poll/long-poll it, abort it, and
+    page through its dataset. Items are written gradually over `run_seconds`,
+    like a real scraper, so streaming consumers see partial datasets.
+    """
+
+    def __init__(self, config=None, jobs=60, run_seconds=1.0, description_chars=1500, extra_bytes=2000,
+                 duplicate_rate=0.2, actor_sources=None, **kwargs):
+        super().__init__(config, **kwargs)
+        self.jobs = jobs
+        self.run_seconds = run_seconds
+        self.description_chars = description_chars
+        self.extra_bytes = extra_bytes
+        self.duplicate_rate = duplicate_rate
+        self.actor_sources = dict(actor_sources or {})
+        self._runs = {}
+
+    def _make_items(self, source, count, seed):
+        rng = random.Random(seed)
+        fields = SOURCE_FIELDS.get(source, SOURCE_FIELDS["linkedin"])
+        items = []
+        for i in range(count):
+            # Postings shared across sources use a seed independent of the source
+            shared = rng.random() < self.duplicate_rate
+            posting = random.Random(f"shared-{i}" if shared else f"{source}-{seed}-{i}")
+            title = posting.choice(TITLES)
+            company = posting.choice(COMPANIES)
+            job = {
+                "title": title,
+                "company": f"{company} Pvt Ltd" if source == "naukri" else company,
+                "location": f"{posting.choice(CITIES)}, India",
+                "url": f"https://jobs.example/{source}/{seed}/{i}",
+                "description": _text(posting, self.description_chars),
+                "skills": ", ".join(posting.sample(WORDS, 6)),
+                "posted_at": "2025-01-01",
+            }
+            item = {fields[name]: value for name, value in job.items()}
+            item["scraperPayload"] = "x" * self.extra_bytes
+            items.append(item)
+        return items
+
+    def _run_view(self, run):
+        elapsed = time.monotonic() - run["started"]
+        if run["status"] == "RUNNING" and elapsed >= self.run_seconds:
+            run["status"] = "SUCCEEDED"
+        return {"id": run["id"], "actId": run["actor"], "status": run["status"],
+                "defaultDatasetId": run["dataset"], "startedAt": "2025-01-01T00:00:00.000Z"}
+
+    def _available(self, run):
+        if run["status"] != "RUNNING":
+            return len(run["items"]) if run["status"] == "SUCCEEDED" else run["written"]
+        progress = min(1.0, (time.monotonic() - run["started"]) / max(self.run_seconds, 1e-9))
+        run["written"] = int(len(run["items"]) * progress)
+        return run["written"]
+
+    def route(self, handler, method, path, query, body):
+        parts = path.strip("/").split("/")
+        if parts[:2] == ["v2", "acts"] and parts[3:] == ["runs"] and method == "POST":
+            actor = parts[2]
+            max_items = int(query.get("maxItems") or self.jobs)
+            run_id = uuid.uuid4().hex[:17]
+            seed = zlib.crc32(json.dumps([actor, body], sort_keys=True).encode())
+            run = {"id": run_id, "actor": actor, "dataset": f"ds-{run_id}", "status": "RUNNING",
+                   "started": time.monotonic(), "written": 0,
+                   "items": self._make_items(self.actor_sources.get(actor), min(max_items, self.jobs), seed)}
+            with self._lock:
+                self._runs[run_id] = run
+                self._runs[run["dataset"]] = run
+            self.count("runs")
+            return handler._send_json({"data": self._run_view(run)}, status=201)
+
+        if parts[:2] == ["v2", "actor-runs"]:
+            run = self._runs[parts[2]]
+            if parts[3:] == ["abort"] and method == "POST":
+                self._available(run)
+                run["status"] = "ABORTED"
+                self.count("aborts")
+                return handler._send_json({"data": self._run_view(run)})
+            wait = min(float(query.get("waitForFinish") or 0), 60)
+            deadline = time.monotonic() + wait
+            while self._run_view(run)["status"] == "RUNNING" and time.monotonic() < deadline:
+                time.sleep(0.02)
+            return handler._send_json({"data": self._run_view(run)})
+
+        if parts[:2] == ["v2", "datasets"] and parts[3:] == ["items"]:
+            run = self._runs[parts[2]]
+            available = self._available(run)
+            offset = int(query.get("offset") or 0)
+            limit = int(query.get("limit") or available)
+            items = run["items"][offset:min(offset + limit, available)]
+            if query.get("fields"):
+                keep = query["fields"].split(",")
+                items = [{key: item[key] for key in keep if key in item} for item in items]
+            self.count("items", len(items))
+            return handler._send_json(items, headers={
+                "x-apify-pagination-total": str(available), "x-apify-pagination-offset": str(offset),
+                "x-apify-pagination-count": str(len(items)), "x-apify-pagination-limit": str(limit),
+                "x-apify-pagination-desc": "",
+            })
+        raise KeyError(path)
+
+
+class FakeGemini(_FakeServer):
+    """
+    Gemini API subset: generateContent, streamGenerateContent (SSE),
+    countTokens and batchEmbedContents. JSON-mode requests get an object with
+    every property of the response schema filled in.
+    """
+
+    def __init__(self, config=None, response_chars=1200, chunk_chars=80, chunk_delay=0.01, **kwargs):
+        super().__init__(config, **kwargs)
+        self.response_chars = response_chars
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+
+    def _answer(self, request, rng):
+        config = request.get("generationConfig") or {}
+        chars = min(self.response_chars, int(config.get("maxOutputTokens") or 10 ** 6) * 4)
+        if config.get("responseMimeType") == "application/json":
+            properties = (config.get("responseSchema") or {}).get("properties") or {"text": {}}
+            share = max(1, chars // len(properties))
+            return json.dumps({name: _text(rng, share) for name in properties})
+        return _text(rng, chars)
+
+    @staticmethod
+    def _prompt_chars(request):
+        return sum(len(part.get("text", "")) for content in request.get("contents", [])
+                   for part in content.get("parts", []))
+
+    def _response(self, text, prompt_tokens, final=True):
+        payload = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}]}
+        if final:
+            payload["candidates"][0]["finishReason"] = "STOP"
+            payload["usageMetadata"] = {"promptTokenCount": prompt_tokens,
+                                        "candidatesTokenCount": max(1, len(text) // 4),
+                                        "totalTokenCount": prompt_tokens + max(1, len(text) // 4)}
+        return payload
+
+    def route(self, handler, method, path, query, body):
+        match = re.fullmatch(r"/v1beta/models/([^:]+):(\w+)", path)
+        if not match or method != "POST":
+            raise KeyError(path)
+        action = match.group(2)
+        rng = random.Random(zlib.crc32(json.dumps(body, sort_keys=True).encode()))
+        prompt_tokens = self._prompt_chars(body) // 4
+        self.count(action)
+
+        if action == "generateContent":
+            return handler._send_json(self._response(self._answer(body, rng), prompt_tokens))
+
+        if action == "countTokens":
+            return handler._send_json({"totalTokens": prompt_tokens})
+
+        if action == "batchEmbedContents":
+            embeddings = []
+            for request in body.get("requests", []):
+                text = " ".join(part.get("text", "") for part in request["content"]["parts"])
+                vector_rng = random.Random(zlib.crc32(text.encode()))
+                dim = int(request.get("outputDimensionality") or 768)
+                embeddings.append({"values": [vector_rng.gauss(0, 1) for _ in range(dim)]})
+            return handler._send_json({"embeddings": embeddings})
+
+        if action == "streamGenerateContent":
+            text = self._answer(body, rng)
+            handler.send_response(200)
+            handler.send_header("Content-Type", "text/event-stream")
+            handler.send_header("Connection", "close")
+            handler.end_headers()
+            chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or [""]
+            for i, chunk in enumerate(chunks):
+                event = self._response(chunk, prompt_tokens, final=i == len(chunks) - 1)
+                handler.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+                handler.wfile.flush()
+                time.sleep(self.chunk_delay)
+            handler.close_connection = True
+            return
+        raise KeyError(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apify-port", type=int, default=8701)
+    parser.add_argument("--gemini-port", type=int, default=8702)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from src.job_api import ACTORS
+
+    config = FakeConfig(latency=args.latency, failure_rate=args.failure_rate)
+    apify = FakeApify(config, port=args.apify_port,
+                      actor_sources={actor_id: source for source, (actor_id, _) in ACTORS.items()}).start()
+    gemini = FakeGemini(config, port=args.gemini_port).start()
+    print(f"APIFY_API_URL={apify.url}\nGEMINI_BASE_URL={gemini.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        apify.stop()
+        gemini.stop()
+
+
+if __name__ == "__main__":
+    main()
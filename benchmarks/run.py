@@ -0,0 +1,386 @@
+"""
+Offline end-to-end benchmark suite.
+
+Starts local fake Apify and Gemini servers (benchmarks/fakes.py), points the
+app at them, and measures latency and throughput of:
+
+  - pdf.*   PDF extraction over a corpus of generated resumes
+  - app.*   the stages app.py runs (extract, streamed analysis, local and
+            Gemini-refined keywords, planned fetch + dedup + re-ranking,
+            final ranking and skill gaps)
+  - mcp.*   mcp-server.py tools, called through an in-memory MCP session
+
+Results are written as JSON; pass --compare with an earlier report to print
+per-scenario deltas and fail on regressions.
+
+    python benchmarks/run.py --output benchmarks/results/baseline.json
+    python benchmarks/run.py --compare benchmarks/results/baseline.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import generate_corpus  # noqa: E402
+from benchmarks.fakes import FakeApify, FakeConfig, FakeGemini  # noqa: E402
+
+SCENARIO_GROUPS = ("pdf", "app", "mcp")
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies, errors, wall, concurrency, units=None):
+    result = {
+        "iterations": len(latencies) + errors,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_per_s": round((len(latencies) + errors) / wall, 2) if wall else None,
+    }
+    if latencies:
+        result.update({
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+        })
+    if units is not None:
+        result["units_per_s"] = round(units / wall, 2) if wall else None
+    return result
+
+
+def measure(func, iterations, concurrency=1, units=None):
+    """Call func(i) `iterations` times on `concurrency` threads; units(i) counts work done per call"""
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            func(i)
+            return time.perf_counter() - start, None
+        except Exception as exc:
+            return None, exc
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, range(iterations)))
+    wall = time.perf_counter() - start
+    latencies = [elapsed for elapsed, error in outcomes if error is None]
+    errors = [error for _, error in outcomes if error is not None]
+    if errors:
+        print(f"   {len(errors)} error(s), first: {errors[0]!r}", file=sys.stderr)
+    total_units = sum(units(i) for i in range(iterations)) if units else None
+    return summarize(latencies, len(errors), wall, concurrency, total_units)
+
+
+async def measure_async(func, iterations, concurrency=1):
+    """Async counterpart of measure(): func(i) is awaited with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def timed(i):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await func(i)
+                latencies.append(time.perf_counter() - start)
+            except Exception as exc:
+                errors.append(exc)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(iterations)))
+    wall = time.perf_counter() - start
+    if errors:
+        print(f"   {len(errors)} error(s), first: {errors[0]!r}", file=sys.stderr)
+    return summarize(latencies, len(errors), wall, concurrency)
+
+
+def configure_environment(args, apify, gemini, workdir):
+    """
+    Point the app at the fakes, turn off caches so every call does real work,
+    and keep every store in workdir so fake postings never reach the real ones
+    """
+    os.environ.update({
+        "APIFY_API_TOKEN": "fake-token",
+        "GOOGLE_API_KEY": "fake-key",
+        "APIFY_API_URL": apify.url,
+        "GEMINI_BASE_URL": gemini.url,
+        "GEMINI_CACHE_PATH": "",
+        "JOB_CACHE_TTL": "0",
+        "JOB_CACHE_STALE_TTL": "0",
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "JOB_INDEX_PATH": os.path.join(workdir, "job-index"),
+        # Deterministic local embedder, so no run depends on an embedding API
+        "JOB_EMBEDDER": "hashing",
+        "RESULT_STORE_PATH": "",
+        "PREFETCH_ENABLED": "false",
+        "ACTOR_POLL_SECONDS": "1",
+        "REQUEST_DEADLINE": str(args.deadline),
+    })
+
+
+def run_pdf(args, corpus, results):
+    from src.pdf import extract_text_from_pdf
+
+    for name, kwargs in (("pdf.extract", {}), ("pdf.extract_sequential", {"workers": 1})):
+        print(f"-> {name}")
+        results[name] = measure(
+            lambda i: extract_text_from_pdf(corpus[i % len(corpus)][1], **kwargs),
+            args.iterations, args.concurrency, units=lambda i: corpus[i % len(corpus)][0],
+        )
+
+
+def run_app(args, corpus, results):
+    """The same calls app.py makes for each pipeline stage"""
+    from src.analysis import KEYWORDS_USE_LLM, generate_job_keywords, stream_resume_analysis
+    from src.dedup import Deduplicator
+    from src.helper import extract_text_from_pdf
+    from src.query_planner import fetch_planned_jobs, plan_runs
+    from src.ranking import rank_jobs
+    from src.resilience import deadline
+    from src.skills import skill_gaps
+
+    resumes = [extract_text_from_pdf(data) for _, data in corpus]
+    first_chunk = []
+
+    def analysis(i):
+        start = time.perf_counter()
+        with deadline():
+            for n, _ in enumerate(stream_resume_analysis(resumes[i % len(resumes)])):
+                if n == 0:
+                    first_chunk.append(time.perf_counter() - start)
+
+    def keywords(i, use_llm=KEYWORDS_USE_LLM):
+        with deadline():
+            return generate_job_keywords(resumes[i % len(resumes)], use_llm=use_llm)
+
+    fetched = {}
+
+    def fetch(i):
+        # Each distinct keyword is a search per source; the iteration number keeps concurrent
+        # iterations from coalescing onto one actor run in the job cache
+        runs = [(source, f"{query} {i}", rows) for source, query, rows in plan_runs(keywords(i), rows=args.jobs)]
+        deduplicator = Deduplicator()
+        jobs_by_source = {source: [] for source, _, _ in runs}
+        all_jobs = []
+        with deadline():
+            for source, _, jobs in fetch_planned_jobs(runs):
+                jobs_by_source[source].extend(deduplicator.add(source, jobs))
+                # app.py re-ranks everything fetched so far after each search
+                all_jobs = [job for source_jobs in jobs_by_source.values() for job in source_jobs]
+                rank_jobs(resumes[i % len(resumes)], all_jobs, top_k=len(all_jobs))
+        fetched[i % len(resumes)] = all_jobs
+
+    def rank(i):
+        resume = resumes[i % len(resumes)]
+        jobs = fetched.get(i % len(resumes)) or next(iter(fetched.values()), [])
+        rank_jobs(resume, jobs, top_k=len(jobs))
+        skill_gaps(resume, jobs)
+
+    stages = (
+        ("app.extract", lambda i: extract_text_from_pdf(corpus[i % len(corpus)][1])),
+        ("app.analysis", analysis),
+        ("app.keywords", keywords),
+        ("app.keywords_llm", lambda i: keywords(i, use_llm=True)),
+        ("app.fetch_jobs", fetch),
+        ("app.rank", rank),
+    )
+    for name, func in stages:
+        print(f"-> {name}")
+        results[name] = measure(func, args.iterations, args.concurrency)
+    if first_chunk:
+        results["app.analysis_first_chunk"] = summarize(first_chunk, 0, None, args.concurrency)
+
+
+def _load_server():
+    spec = importlib.util.spec_from_file_location("mcp_server", os.path.join(ROOT, "mcp-server.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _run_mcp(args, corpus, results):
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from src import job_api
+    from src.helper import extract_text_from_pdf
+
+    server = _load_server()
+    resumes = [extract_text_from_pdf(data) for _, data in corpus]
+
+    async with create_connected_server_and_client_session(server.mcp._mcp_server) as session:
+        async def call(tool, arguments):
+            result = await session.call_tool(tool, arguments)
+            if result.isError:
+                raise RuntimeError(result.content[0].text if result.content else tool)
+            if not result.content:
+                return None
+            try:
+                return json.loads(result.content[0].text)
+            except ValueError:
+                return result.content[0].text
+
+        first = await call("fetch_all_jobs", {"keywords": "python developer", "max_results": args.jobs})
+        # Let the embedding listener index the fetched postings before semantic search runs
+        job_api._listener_pool.submit(lambda: None).result()
+
+        scenarios = (
+            ("mcp.fetch_all_jobs", lambda i: call("fetch_all_jobs", {
+                "keywords": f"python developer {i}", "max_results": args.jobs})),
+            ("mcp.fetch_linkedin_jobs", lambda i: call("fetch_linkedin_jobs", {
+                "keywords": f"data engineer {i}", "max_results": args.jobs})),
+            ("mcp.get_jobs_page", lambda i: call("get_jobs_page", {"cursor": first["next_cursor"]})),
+            ("mcp.rank_jobs", lambda i: call("rank_jobs", {
+                "resume_text": resumes[i % len(resumes)], "result_id": first["result_id"]})),
+            ("mcp.semantic_match_jobs", lambda i: call("semantic_match_jobs", {
+                "resume_text": resumes[i % len(resumes)]})),
+            ("mcp.analyze_resume_summary", lambda i: call("analyze_resume_summary", {
+                "resume_text": resumes[i % len(resumes)]})),
+            ("mcp.analyze_resume_full", lambda i: call("analyze_resume_full", {
+                "resume_text": resumes[i % len(resumes)]})),
+            ("mcp.generate_job_keywords", lambda i: call("generate_job_keywords", {
+                "resume_summary": resumes[i % len(resumes)][:2000]})),
+        )
+        for name, func in scenarios:
+            if first.get("next_cursor") is None and name == "mcp.get_jobs_page":
+                continue
+            print(f"-> {name}")
+            results[name] = await measure_async(func, args.iterations, args.concurrency)
+
+
+def run_mcp(args, corpus, results):
+    asyncio.run(_run_mcp(args, corpus, results))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, max_regression, min_delta_ms=5.0):
+    """
+    Print p50/p95 deltas against a baseline report and return the regressions:
+    growth beyond max_regression, ignoring changes under min_delta_ms (noise).
+    """
+    regressions = []
+    print(f"\n{'scenario':34} {'p50 ms':>18} {'p95 ms':>18}")
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if not base or "p50_ms" not in result or "p50_ms" not in base:
+            continue
+        cells = []
+        for metric in ("p50_ms", "p95_ms"):
+            change = (result[metric] - base[metric]) / max(base[metric], 1e-9)
+            cells.append(f"{base[metric]:.1f}->{result[metric]:.1f} {change:+.0%}")
+            if change > max_regression and result[metric] - base[metric] >= min_delta_ms:
+                regressions.append((name, metric, change))
+        print(f"{name:34} {cells[0]:>18} {cells[1]:>18}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIO_GROUPS),
+                        help="comma-separated groups to run: pdf, app, mcp")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--resumes", type=int, default=10, help="size of the generated resume corpus")
+    parser.add_argument("--max-pages", type=int, default=6)
+    parser.add_argument("--jobs", type=int, default=60, help="postings returned by each actor run")
+    parser.add_argument("--description-chars", type=int, default=1500)
+    parser.add_argument("--actor-seconds", type=float, default=1.0, help="how long each fake actor run takes")
+    parser.add_argument("--apify-latency", type=float, default=0.02)
+    parser.add_argument("--gemini-latency", type=float, default=0.2)
+    parser.add_argument("--response-chars", type=int, default=1200)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of fake requests that 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of fake requests in the slow tail")
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--deadline", type=float, default=60.0, help="REQUEST_DEADLINE for the app under test")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="with --compare, fail if p50 or p95 grows by more than this fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="with --compare, ignore changes smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    groups = [group.strip() for group in args.scenarios.split(",") if group.strip()]
+    unknown = set(groups) - set(SCENARIO_GROUPS)
+    if unknown:
+        parser.error(f"unknown scenario group(s): {', '.join(sorted(unknown))}")
+
+    apify_config = FakeConfig(latency=args.apify_latency, failure_rate=args.failure_rate,
+                              slow_rate=args.slow_rate, slow_latency=args.slow_latency, seed=args.seed)
+    gemini_config = FakeConfig(latency=args.gemini_latency, failure_rate=args.failure_rate,
+                               slow_rate=args.slow_rate, slow_latency=args.slow_latency, seed=args.seed)
+    apify = FakeApify(apify_config, jobs=args.jobs, run_seconds=args.actor_seconds,
+                      description_chars=args.description_chars).start()
+    gemini = FakeGemini(gemini_config, response_chars=args.response_chars).start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Modules read their settings at import, so configure before importing anything from src
+        configure_environment(args, apify, gemini, workdir)
+        from src.job_api import ACTORS
+        from src.resilience import outcome_stats
+
+        apify.actor_sources = {actor_id: source for source, (actor_id, _) in ACTORS.items()}
+        corpus = generate_corpus(args.resumes, max_pages=args.max_pages, seed=args.seed)
+
+        results = {}
+        runners = {"pdf": run_pdf, "app": run_app, "mcp": run_mcp}
+        for group in groups:
+            runners[group](args, corpus, results)
+
+        report = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "config": {key: value for key, value in vars(args).items()
+                           if key not in ("output", "compare", "max_regression", "min_delta_ms")},
+            },
+            "results": results,
+            "call_outcomes": outcome_stats(),
+            "fake_requests": {"apify": dict(apify.counters), "gemini": dict(gemini.counters)},
+        }
+    apify.stop()
+    gemini.stop()
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression, args.min_delta_ms)
+        if regressions:
+            for name, metric, change in regressions:
+                print(f"❌ {name} {metric} regressed by {change:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+MCP server cold-start benchmark.
+
+Measures, in fresh interpreter processes:
+  - import: time to import mcp-server.py (module load, tool registration)
+  - ready:  time from spawning the server over stdio until it answers tools/list
+
+API keys are removed from the environment, since clients are created and
+validated on first use rather than at startup.
+
+    python benchmarks/startup.py --runs 10 --max-ms 1500
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, "mcp-server.py")
+
+_IMPORT_SNIPPET = """
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("mcp_server", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print((time.perf_counter() - start) * 1000)
+print(",".join(name for name in ("fitz", "google.genai", "apify_client", "scipy", "numpy") if name in sys.modules))
+"""
+
+
+def _clean_env():
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("GOOGLE_API_KEY", "APIFY_API_TOKEN")}
+    env["PYTHONPATH"] = ROOT
+    return env
+
+
+def time_import():
+    """Milliseconds to import the server module, and any heavy modules it loaded eagerly"""
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET, SERVER],
+        cwd=ROOT, env=_clean_env(), capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name]
+
+
+async def _time_ready():
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[SERVER], cwd=ROOT, env=_clean_env())
+    start = time.perf_counter()
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await session.list_tools()
+                return (time.perf_counter() - start) * 1000
+
+
+def time_ready():
+    """Milliseconds from spawning the server until it has answered tools/list"""
+    return asyncio.run(_time_ready())
+
+
+def summarize(samples):
+    return {
+        "min_ms": round(min(samples), 1),
+        "median_ms": round(statistics.median(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="exit non-zero if the median time-to-ready exceeds this")
+    args = parser.parse_args()
+
+    imports, eager = [], set()
+    for _ in range(args.runs):
+        elapsed, loaded = time_import()
+        imports.append(elapsed)
+        eager.update(loaded)
+    ready = [time_ready() for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "import": summarize(imports),
+        "ready": summarize(ready),
+        "eager_heavy_imports": sorted(eager),
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.max_ms is not None and report["ready"]["median_ms"] > args.max_ms:
+        print(f"❌ Median time-to-ready {report['ready']['median_ms']} ms exceeds {args.max_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
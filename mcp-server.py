@@ -1,45 +1,247 @@
+import argparse
+import os
 from mcp.server import FastMCP
-from src.job_api import fetch_linkedin_jobs, fetch_naukri_jobs
-from src.helper import ask_gemini
+from mcp.server.fastmcp import Context
+from starlette.responses import JSONResponse, PlainTextResponse
+from src.analysis import KEYWORDS_USE_LLM, analyze_resume_async, keyword_prompt, stream_resume_analysis
+from src.batch import BATCH_CONCURRENCY, BATCH_ROOT, BATCH_RPM, process_resumes
+from src.executor import iterate_blocking, run_blocking
+from src.http_server import (HTTP_TRANSPORTS, MCP_HOST, MCP_PORT, MCP_TRANSPORT, MCP_WORKERS, build_app,
+                             client_limiter, transport_security)
+from src.helper import count_tokens, stream_gemini, token_usage
+from src.compaction import prepare_resume
+from src.cache import get_gemini_cache
+from src.job_cache import job_cache
+from src.job_store import get_job_store, needs_live_fetch
+from src.prefetch import PREFETCH_ENABLED, prefetch_scheduler
+from src.query_planner import fetch_planned_jobs_async, plan_runs
+from src.ranking import rank_jobs as rank_jobs_bm25
+from src.skills import extract_skills as find_skills, extract_titles, generate_keywords, skill_gaps
+from src.embeddings import semantic_match_jobs as semantic_match
+from src.dedup import Deduplicator
+from src.records import JobRecord
+from src.result_store import RESULT_PAGE_SIZE, result_store
+from src.resilience import REQUEST_DEADLINE, outcome_stats, with_deadline
+from src.metrics import to_json as metrics_json, to_prometheus, traced
 
 mcp = FastMCP("AI Job Recommender - Your Career Intelligence Assistant")
 
+
+async def ask_gemini_streaming(prompt, max_tokens, ctx=None):
+    """Stream a Gemini answer to the client as progress notifications and return the full text"""
+    parts = []
+    async for chunk in iterate_blocking(stream_gemini(prompt, max_tokens=max_tokens)):
+        parts.append(chunk)
+        if ctx is not None:
+            await ctx.report_progress(len(parts), message=chunk)
+    return "".join(parts)
+
+
+async def fetch_planned(keywords, location, max_results, sources=None, deduplicate=True, page_size=RESULT_PAGE_SIZE,
+                        ctx=None):
+    """Split keywords into distinct queries, run them across sources within the run budget and merge the results"""
+    runs = plan_runs(keywords, max_results, sources)
+    deduplicator = Deduplicator() if deduplicate else None
+    all_jobs = []
+    counts = {source: 0 for source, _, _ in runs}
+    done = 0
+    async for source, query, jobs in fetch_planned_jobs_async(runs, location):
+        if deduplicator is not None:
+            jobs = await run_blocking(deduplicator.add, source, jobs)
+        all_jobs.extend(jobs)
+        counts[source] += len(jobs)
+        done += 1
+        if ctx is not None:
+            await ctx.report_progress(done, len(runs))
+            await ctx.info(f"{source} / {query}: {len(jobs)} new jobs")
+    queries = list(dict.fromkeys(query for _, query, _ in runs))
+    return {"queries": queries, "per_source": counts, **result_store.paginate(all_jobs, page_size)}
+
 # ==================== TOOLS ====================
 
 @mcp.tool()
-async def fetch_linkedin_jobs(keywords: str, location: str = "india", max_results: int = 60):
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def fetch_linkedin_jobs(keywords: str, location: str = "india", max_results: int = 60,
+                              page_size: int = RESULT_PAGE_SIZE):
     """
     Fetch job listings from LinkedIn based on search keywords and location.
     
     Args:
         keywords: Job search keywords (e.g., "Python Developer, Software Engineer")
         location: Job location (default: "india")
-        max_results: Maximum number of jobs to return (default: 60)
+        max_results: Maximum number of jobs to fetch (default: 60)
+        page_size: Number of jobs per returned page (default: 20)
+    
+    Each comma-separated keyword becomes its own search (near-synonyms are searched once).
     
     Returns:
-        List of job listings with title, company, location, and link
+        First page of job listings (id, title, company, location, url, description, ...),
+        the queries searched, the total count, and a next_cursor for get_jobs_page
     """
-    return fetch_linkedin_jobs(keywords, location, max_results)
+    return await fetch_planned(keywords, location, max_results, ["linkedin"], page_size=page_size)
 
 
 @mcp.tool()
-async def fetch_naukri_jobs(keywords: str, location: str = "india", max_results: int = 60):
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def fetch_naukri_jobs(keywords: str, location: str = "india", max_results: int = 60,
+                            page_size: int = RESULT_PAGE_SIZE):
     """
     Fetch job listings from Naukri.com based on search keywords.
     
     Args:
         keywords: Job search keywords (e.g., "Python Developer, Data Scientist")
         location: Job location (default: "india")
+        max_results: Maximum number of jobs to fetch (default: 60)
+        page_size: Number of jobs per returned page (default: 20)
+    
+    Each comma-separated keyword becomes its own search (near-synonyms are searched once).
+    
+    Returns:
+        First page of job listings (id, title, company, location, url, description, ...),
+        the queries searched, the total count, and a next_cursor for get_jobs_page
+    """
+    return await fetch_planned(keywords, location, max_results, ["naukri"], page_size=page_size)
+
+
+@mcp.tool()
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def fetch_all_jobs(keywords: str, location: str = "india", max_results: int = 60,
+                         sources: list[str] | None = None, deduplicate: bool = True,
+                         page_size: int = RESULT_PAGE_SIZE, ctx: Context = None):
+    """
+    Fetch job listings from all registered sources (LinkedIn, Naukri, ...) concurrently.
+    
+    Each comma-separated keyword becomes its own search (near-synonyms are searched once),
+    fanned out across sources within a per-request budget of actor runs.
+    
+    Args:
+        keywords: Job search keywords (e.g., "Python Developer, Data Scientist")
+        location: Job location (default: "india")
+        max_results: Maximum number of jobs to fetch per source (default: 60)
+        sources: Optional subset of sources to query (default: all registered sources)
+        deduplicate: Drop postings already returned by another source, or repeated
+                     within one (default: True)
+        page_size: Number of jobs per returned page (default: 20)
+    
+    Returns:
+        First page of the merged job listings, each with a "sources" list, plus the
+        queries searched, the per-source counts, the total count and a next_cursor for get_jobs_page
+    """
+    return await fetch_planned(keywords, location, max_results, sources, deduplicate, page_size, ctx)
+
+
+@mcp.tool()
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def get_jobs_page(cursor: str, page_size: int = RESULT_PAGE_SIZE):
+    """
+    Fetch the next page of a previous job search.
+    
+    Args:
+        cursor: The next_cursor value returned by a fetch tool or a previous page
+        page_size: Number of jobs per returned page (default: 20)
+    
+    Returns:
+        The page of job listings, the total count, and the next_cursor (null on the last page)
+    """
+    return result_store.next_page(cursor, page_size)
+
+
+@mcp.tool()
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def rank_jobs(resume_text: str, result_id: str | None = None, jobs: list[dict] | None = None,
+                    top_k: int = 20):
+    """
+    Rank job listings against a resume locally with BM25 and skill overlap (no LLM call).
+    
+    Args:
+        resume_text: Full text content of the resume
+        result_id: The result_id of a previous fetch, to rank all of its jobs server-side
+        jobs: Alternatively, job listings to rank directly
+        top_k: Number of best-matching jobs to return (default: 20)
+    
+    Returns:
+        Best-matching jobs with their score, the resume terms that matched and the
+        posting's skills the resume has (matched_skills) or lacks (missing_skills)
+    """
+    if result_id:
+        records = result_store.get(result_id)
+    else:
+        records = [JobRecord.coerce(job) for job in jobs or []]
+    ranked = await run_blocking(rank_jobs_bm25, resume_text, records, top_k)
+    return [{**item, "job": item["job"].to_dict()} for item in ranked]
+
+
+@mcp.tool()
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def semantic_match_jobs(resume_text: str, top_k: int = 20, nprobe: int | None = None):
+    """
+    Find previously fetched jobs closest in meaning to a resume, using the local embedding index.
+    
+    Args:
+        resume_text: Full text content of the resume
+        top_k: Number of matching jobs to return (default: 20)
+        nprobe: Scan only this many nearest partitions instead of every vector; needs
+                partitions built with `python -m src.embeddings partition` (default: scan all)
+    
+    Returns:
+        Matching jobs with title, company, location, URL, source and similarity score
+    """
+    return await run_blocking(semantic_match, resume_text, top_k, nprobe)
+
+
+@mcp.tool()
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def search_jobs_local(keywords: str, location: str = "", max_results: int = 60,
+                            live_fallback: bool = True, page_size: int = RESULT_PAGE_SIZE):
+    """
+    Full-text search over every job fetched so far, answered from the local store without an actor run.
+    
+    Args:
+        keywords: Job search keywords (e.g., "Python Developer, Data Scientist")
+        location: Only jobs whose location contains this text (default: any location)
         max_results: Maximum number of jobs to return (default: 60)
+        live_fallback: Run a live fetch from all sources when local matches are too few
+                       or too old, then search again (default: True)
+        page_size: Number of jobs per returned page (default: 20)
     
     Returns:
-        List of job listings with title, company, location, and URL
+        First page of matching jobs (best match first), the total count, a next_cursor for
+        get_jobs_page, "origin" ("local" or "live") and, after a fallback, why it ran
     """
-    return fetch_naukri_jobs(keywords, location, max_results)
+    job_store = await run_blocking(get_job_store)
+    if job_store is None:
+        raise ValueError("❌ Local job store is disabled (JOB_STORE_PATH is empty)")
+    max_results = max(1, max_results)
+    results, total = await run_blocking(job_store.search, keywords, location, max_results)
+    reason = needs_live_fetch(results, total)
+    origin = "local"
+    if reason and live_fallback:
+        try:
+            runs = plan_runs(keywords, max_results)
+            async for source, _, jobs in fetch_planned_jobs_async(runs, location or "india"):
+                await run_blocking(job_store.upsert, source, jobs)
+            results, total = await run_blocking(job_store.search, keywords, location, max_results)
+            origin = "live"
+        except Exception as exc:
+            # Whatever is stored locally beats no answer
+            if not results:
+                raise
+            reason = f"{reason}; live fetch failed: {exc}"
+    return {"origin": origin, "fallback_reason": reason, "matches": total,
+            **result_store.paginate([job for job, _ in results], page_size)}
 
 
 @mcp.tool()
-async def analyze_resume_summary(resume_text: str):
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def analyze_resume_summary(resume_text: str, ctx: Context = None):
     """
     Generate a comprehensive resume summary highlighting skills, experience, and education.
     
@@ -49,6 +251,7 @@ async def analyze_resume_summary(resume_text: str):
     Returns:
         AI-generated professional summary
     """
+    resume_text = await run_blocking(prepare_resume, resume_text, "summary", count_tokens=count_tokens)
     prompt = f"""Analyze this resume and provide a comprehensive summary highlighting:
     - Key skills and technical expertise
     - Educational background
@@ -60,11 +263,13 @@ async def analyze_resume_summary(resume_text: str):
     
     Provide a well-structured, professional summary."""
     
-    return ask_gemini(prompt, max_tokens=600)
+    return await ask_gemini_streaming(prompt, 600, ctx)
 
 
 @mcp.tool()
-async def identify_skill_gaps(resume_text: str):
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def identify_skill_gaps(resume_text: str, ctx: Context = None):
     """
     Analyze resume to identify missing skills, certifications, and areas for improvement.
     
@@ -74,6 +279,7 @@ async def identify_skill_gaps(resume_text: str):
     Returns:
         Detailed skill gap analysis with recommendations
     """
+    resume_text = await run_blocking(prepare_resume, resume_text, "skill_gaps", count_tokens=count_tokens)
     prompt = f"""Based on this resume, conduct a thorough skill gap analysis:
     - Identify in-demand skills that are missing
     - Suggest relevant certifications that would enhance the profile
@@ -85,11 +291,13 @@ async def identify_skill_gaps(resume_text: str):
     
     Provide actionable insights organized by priority."""
     
-    return ask_gemini(prompt, max_tokens=600)
+    return await ask_gemini_streaming(prompt, 600, ctx)
 
 
 @mcp.tool()
-async def create_career_roadmap(resume_text: str):
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def create_career_roadmap(resume_text: str, ctx: Context = None):
     """
     Generate a personalized career development roadmap based on current skills and experience.
     
@@ -99,6 +307,7 @@ async def create_career_roadmap(resume_text: str):
     Returns:
         12-month career roadmap with actionable steps
     """
+    resume_text = await run_blocking(prepare_resume, resume_text, "roadmap", count_tokens=count_tokens)
     prompt = f"""Create a personalized 12-month career development roadmap based on this resume:
     - Month 1-3: Immediate actions and quick wins
     - Month 4-6: Skill development and certifications
@@ -110,34 +319,211 @@ async def create_career_roadmap(resume_text: str):
     
     Make it specific, actionable, and realistic."""
     
-    return ask_gemini(prompt, max_tokens=700)
+    return await ask_gemini_streaming(prompt, 700, ctx)
+
+
+@mcp.tool()
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def analyze_resume_full(resume_text: str, mode: str = "combined", ctx: Context = None):
+    """
+    Generate the resume summary, skill gap analysis and career roadmap in one go.
+    
+    Args:
+        resume_text: Full text content of the resume
+        mode: "combined" for a single structured request (falls back to "parallel"
+              if needed), or "parallel" for one concurrent request per section
+    
+    Returns:
+        Dictionary with "summary", "skill_gaps" and "roadmap" sections
+    """
+    if mode != "combined" or ctx is None:
+        return await analyze_resume_async(resume_text, mode)
+
+    # Stream each section's new text to the client as it is generated
+    sent = {}
+    sections = {}
+    updates = 0
+    async for sections in iterate_blocking(stream_resume_analysis(resume_text)):
+        for section, text in sections.items():
+            delta = text[len(sent.get(section, "")):]
+            if delta and text.startswith(sent.get(section, "")):
+                updates += 1
+                await ctx.report_progress(updates, message=f"[{section}] {delta}")
+            sent[section] = text
+    return sections
+
+
+@mcp.tool()
+@traced("mcp_tool")
+# No overall deadline: a batch takes as long as it takes, and each resume gets its own
+async def analyze_resume_batch(directory: str, output_path: str | None = None, mode: str = "combined",
+                               concurrency: int = BATCH_CONCURRENCY, requests_per_minute: float = BATCH_RPM,
+                               ctx: Context = None):
+    """
+    Analyze every resume PDF in a directory on the server (summary, skill gaps, roadmap per resume).
+    
+    Only available when the server sets BATCH_ROOT; both paths are relative to it and may not leave it.
+    
+    Args:
+        directory: Directory containing the resume PDFs, relative to the batch root
+        output_path: JSONL file for the results, relative to the batch root (default: <directory>/analysis.jsonl)
+        mode: "combined" (one call per resume) or "parallel" (one call per section)
+        concurrency: Resumes analyzed at the same time (default: 4)
+        requests_per_minute: Analyses started per minute, 0 for no limit (default: 60)
+    
+    Results are appended to the output file as each resume finishes; rerunning
+    with the same output skips resumes that were already analyzed.
+    
+    Returns:
+        Counts of analyzed, failed and skipped resumes and the output path
+    """
+    async def report(record, done, total):
+        if ctx is not None:
+            await ctx.report_progress(done, total, message=f"{record['file']}: {record['status']}")
+
+    if not BATCH_ROOT:
+        raise ValueError("❌ Batch analysis is disabled (the server has no BATCH_ROOT)")
+    return await process_resumes(directory, output_path, mode, concurrency, requests_per_minute, on_result=report,
+                                 root=BATCH_ROOT)
 
 
 @mcp.tool()
-async def generate_job_keywords(resume_summary: str):
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def generate_job_keywords(resume_summary: str, use_llm: bool = KEYWORDS_USE_LLM, ctx: Context = None):
     """
-    Extract optimal job search keywords from a resume summary.
+    Extract optimal job search keywords from a resume summary (or the full resume text).
     
     Args:
         resume_summary: Professional summary of the resume
+        use_llm: Have Gemini refine the keywords found by the local skill taxonomy
+                 (default: off; Gemini is also used when the taxonomy finds nothing)
     
     Returns:
         Comma-separated list of job titles and keywords
     """
-    prompt = f"""Based on this professional summary, extract the most relevant job titles and keywords for job searching.
-    
-    Summary: {resume_summary}
+    keywords = await run_blocking(generate_keywords, resume_summary)
+    if keywords and not use_llm:
+        return keywords
+    return await ask_gemini_streaming(keyword_prompt(resume_summary, keywords), 150, ctx)
+
+
+@mcp.tool()
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def extract_skills(text: str):
+    """
+    Find known skills and job titles in a resume or job description, locally and deterministically (no LLM call).
     
-    Instructions:
-    - Focus on job titles, roles, and technical skills
-    - Include both specific and general terms
-    - Prioritize terms that appear in job postings
-    - Return ONLY a comma-separated list
+    Args:
+        text: Resume or job description text
     
-    Example: "Senior Software Engineer, Python Developer, Backend Engineer, Full Stack Developer"
+    Returns:
+        Skills and job titles mentioned (most frequent first) and the search keywords they make
     """
+    return {"skills": find_skills(text), "titles": extract_titles(text), "keywords": generate_keywords(text)}
+
+
+@mcp.tool()
+@traced("mcp_tool")
+@with_deadline(REQUEST_DEADLINE)
+async def market_skill_gaps(resume_text: str, result_id: str | None = None, jobs: list[dict] | None = None,
+                            top_k: int = 10):
+    """
+    Skills that job postings ask for but the resume doesn't mention, by how many postings ask (no LLM call).
     
-    return ask_gemini(prompt, max_tokens=150)
+    Args:
+        resume_text: Full text content of the resume
+        result_id: The result_id of a previous fetch, to compare against all of its jobs
+        jobs: Alternatively, job listings to compare against directly
+        top_k: Number of missing skills to return (default: 10)
+    
+    Returns:
+        Missing skills with the number and share of postings that ask for each
+    """
+    if result_id:
+        records = result_store.get(result_id)
+    else:
+        records = [JobRecord.coerce(job) for job in jobs or []]
+    if not records:
+        raise ValueError("❌ Pass the result_id of a job search or a list of jobs")
+    return await run_blocking(skill_gaps, resume_text, records, top_k)
+
+
+# ==================== RESOURCES ====================
+
+@mcp.resource("stats://gemini-cache")
+async def gemini_cache_stats():
+    """Hit/miss/byte counters of the persistent Gemini response cache."""
+    gemini_cache = await run_blocking(get_gemini_cache)
+    if gemini_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **gemini_cache.stats()}
+
+
+@mcp.resource("stats://job-cache")
+async def job_cache_stats():
+    """Hit/miss/coalescing counters of the shared job listing cache."""
+    return job_cache.stats()
+
+
+@mcp.resource("stats://job-store")
+async def job_store_stats():
+    """Postings in the local full-text job store, per source, and how recently they were seen."""
+    job_store = await run_blocking(get_job_store)
+    if job_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **await run_blocking(job_store.stats)}
+
+
+@mcp.resource("stats://prefetch")
+async def prefetch_stats():
+    """Background prefetch scheduler for this process: tracked searches by popularity, cache age, failures and budget use."""
+    return prefetch_scheduler.stats()
+
+
+@mcp.resource("stats://gemini-usage")
+async def gemini_usage_stats():
+    """Cumulative Gemini calls and input/output token counts for this server process."""
+    return dict(token_usage)
+
+
+@mcp.resource("stats://call-outcomes")
+async def call_outcome_stats():
+    """Count and p50/p99 latency of Apify and Gemini calls per outcome (ok, retried, hedged, fallback, timeout, error)."""
+    return outcome_stats()
+
+
+@mcp.resource("stats://metrics")
+async def metrics_stats():
+    """Per-stage latency histograms (PDF extraction, Gemini calls, actor runs, ranking, tools) and token, cost and item counters."""
+    return metrics_json()
+
+
+@mcp.resource("stats://metrics/prometheus", mime_type="text/plain")
+async def metrics_prometheus():
+    """The same metrics in the Prometheus text exposition format, for scraping under load."""
+    return to_prometheus()
+
+
+@mcp.resource("stats://http-clients")
+async def http_client_stats():
+    """Per-client concurrency limit of the HTTP transports: admitted, queued and rejected requests and current load."""
+    return client_limiter.stats()
+
+
+# ==================== HTTP ROUTES ====================
+# Only served by the HTTP transports; metrics are per worker process
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request):
+    return PlainTextResponse(to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@mcp.custom_route("/healthz", methods=["GET"])
+async def health_endpoint(request):
+    return JSONResponse({"status": "ok"})
 
 
 # ==================== PROMPTS ====================
@@ -398,5 +784,51 @@ async def personalized_job_search():
     ]
 
 
+def http_app():
+    """ASGI app for one HTTP worker process; settings come from the MCP_* environment"""
+    if PREFETCH_ENABLED:
+        prefetch_scheduler.start()
+    return build_app(mcp, os.getenv("MCP_TRANSPORT", MCP_TRANSPORT), os.getenv("MCP_HOST", MCP_HOST),
+                     int(os.getenv("MCP_WORKERS", MCP_WORKERS)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job recommender MCP server")
+    parser.add_argument("--transport", choices=["stdio", *HTTP_TRANSPORTS], default=MCP_TRANSPORT)
+    parser.add_argument("--host", default=MCP_HOST)
+    parser.add_argument("--port", type=int, default=MCP_PORT)
+    parser.add_argument("--workers", type=int, default=MCP_WORKERS,
+                        help="Server processes (streamable-http only; sessions become stateless above 1, and "
+                             "per-client limits apply in each process)")
+    args = parser.parse_args()
+
+    if args.transport == "stdio":
+        # Keep popular searches warm in the job cache while the server runs
+        if PREFETCH_ENABLED:
+            prefetch_scheduler.start()
+        mcp.run(transport="stdio")
+        return
+
+    import uvicorn
+
+    try:
+        # Check the allowed hosts here, rather than in every worker process
+        transport_security(args.host)
+    except ValueError as exc:
+        parser.error(str(exc))
+    workers = max(1, args.workers)
+    # Worker processes are spawned and rebuild the app from the environment
+    os.environ.update(MCP_TRANSPORT=args.transport, MCP_HOST=args.host, MCP_WORKERS=str(workers))
+    if workers == 1:
+        uvicorn.run(http_app(), host=args.host, port=args.port)
+        return
+    if args.transport == "sse":
+        parser.error("SSE sessions live in one process; use --transport streamable-http with --workers")
+    # Result cursors must resolve in whichever worker receives the next page request
+    os.environ.setdefault("RESULT_STORE_PATH", ".cache/results.sqlite3")
+    # Spawned workers import this script as __main__, so the factory is found without importing it twice
+    uvicorn.run("__main__:http_app", factory=True, host=args.host, port=args.port, workers=workers)
+
+
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,254 @@
+import contextvars
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from src.helper import ask_gemini, count_tokens, stream_gemini
+from src.compaction import fit_to_budget, normalize_resume, prepare_resume
+from src.executor import run_blocking
+from src.resilience import is_retryable
+from src.skills import generate_keywords
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Job search keywords come from the local skill taxonomy; set to true to have Gemini refine them
+KEYWORDS_USE_LLM = os.getenv("KEYWORDS_USE_LLM", "false").lower() in ("1", "true", "yes")
+
+# Per-section prompts, used when sections are requested one by one
+SECTION_PROMPTS = {
+    "summary": ("""
+You are an experienced technical recruiter.
+
+Summarize the resume below in clear bullet points with:
+- Core Skills
+- Education
+- Work Experience
+- Tools & Technologies
+
+Resume:
+{resume_text}
+""", 500),
+    "skill_gaps": ("""
+You are a career mentor.
+
+Analyze the resume and list:
+- Missing skills
+- Certifications needed
+- Experience gaps
+- Improvement suggestions
+
+Resume:
+{resume_text}
+""", 500),
+    "roadmap": ("""
+You are a senior career advisor.
+
+Create a 6–12 month roadmap including:
+- Skills
+- Certifications
+- Projects
+- Job roles
+
+Resume:
+{resume_text}
+""", 400),
+}
+
+COMBINED_PROMPT = """
+You are an experienced technical recruiter, career mentor and senior career advisor.
+
+Analyze the resume below and fill in every field of the JSON response, each as markdown:
+- summary: clear bullet points covering Core Skills, Education, Work Experience, Tools & Technologies
+- skill_gaps: Missing skills, Certifications needed, Experience gaps, Improvement suggestions
+- roadmap: a 6–12 month roadmap covering Skills, Certifications, Projects, Job roles
+
+Resume:
+{resume_text}
+"""
+
+ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        section: {"type": "STRING"} for section in SECTION_PROMPTS
+    },
+    "required": list(SECTION_PROMPTS),
+    "property_ordering": list(SECTION_PROMPTS),
+}
+
+
+def analyze_section(resume_text, section):
+    """Run a single analysis section as its own Gemini call"""
+    prompt, max_tokens = SECTION_PROMPTS[section]
+    resume_text = prepare_resume(resume_text, section, count_tokens=count_tokens)
+    return ask_gemini(prompt.format(resume_text=resume_text), max_tokens=max_tokens)
+
+
+def analyze_resume_parallel(resume_text, sections=None):
+    """Run analysis sections as separate Gemini calls issued concurrently"""
+    sections = list(sections or SECTION_PROMPTS)
+    with ThreadPoolExecutor(max_workers=len(sections)) as pool:
+        futures = {
+            section: pool.submit(contextvars.copy_context().run, analyze_section, resume_text, section)
+            for section in sections
+        }
+        return {section: future.result() for section, future in futures.items()}
+
+
+def analyze_resume_combined(resume_text):
+    """Run all analysis sections in one structured-output Gemini call, omitting empty sections"""
+    resume_text = prepare_resume(resume_text, "summary", count_tokens=count_tokens)
+    response = ask_gemini(
+        COMBINED_PROMPT.format(resume_text=resume_text),
+        max_tokens=sum(max_tokens for _, max_tokens in SECTION_PROMPTS.values()),
+        response_schema=ANALYSIS_SCHEMA,
+    )
+    result = json.loads(response)
+    return {section: result[section] for section in SECTION_PROMPTS if result.get(section)}
+
+
+def _falls_back(exc):
+    """
+    Whether a failed combined call should be replaced by per-section calls:
+    yes for the API and timeout errors ask_gemini retries as transient (smaller
+    requests may get through), no for ones every call would hit, or a spent deadline
+    """
+    if not is_retryable(exc):
+        return False
+    logger.warning("Combined resume analysis failed (%s); falling back to per-section calls", exc)
+    return True
+
+
+def analyze_resume(resume_text, mode="combined"):
+    """
+    Summary, skill gaps and roadmap for a resume.
+
+    mode="combined" sends the resume once and falls back to parallel
+    per-section calls for any section the structured response didn't fill,
+    including all of them when the combined call fails with a transient error.
+    """
+    if mode == "parallel":
+        return analyze_resume_parallel(resume_text)
+    if mode != "combined":
+        raise ValueError(f"❌ Unknown analysis mode: {mode}")
+
+    try:
+        result = analyze_resume_combined(resume_text)
+    except (ValueError, TypeError, AttributeError):
+        # Truncated or malformed JSON (json.JSONDecodeError is a ValueError)
+        result = {}
+    except Exception as exc:
+        if not _falls_back(exc):
+            raise
+        result = {}
+
+    missing = [section for section in SECTION_PROMPTS if section not in result]
+    if missing:
+        result.update(analyze_resume_parallel(resume_text, missing))
+    return {section: result[section] for section in SECTION_PROMPTS}
+
+
+_FIELD_START = re.compile(r'"(\w+)"\s*:\s*"')
+
+
+def partial_json_fields(buffer):
+    """String fields of a possibly incomplete top-level JSON object, decoded as far as they go"""
+    fields = {}
+    position = 0
+    while match := _FIELD_START.search(buffer, position):
+        start = end = match.end()
+        while end < len(buffer) and buffer[end] != '"':
+            end += 2 if buffer[end] == "\\" else 1
+        raw = buffer[start:min(end, len(buffer))]
+        # Drop a trailing escape sequence that hasn't fully arrived yet
+        for trim in range(7):
+            try:
+                fields[match.group(1)] = json.loads(f'"{raw[:len(raw) - trim]}"')
+                break
+            except ValueError:
+                continue
+        position = end + 1
+    return fields
+
+
+def stream_resume_analysis(resume_text):
+    """
+    Streaming analyze_resume: yields {section: text so far} snapshots while the
+    combined structured response is generated, then the complete analysis
+    (with any section the response left empty filled by a separate call, and
+    every section if the stream fails with a transient error).
+    """
+    prepared = prepare_resume(resume_text, "summary", count_tokens=count_tokens)
+    buffer = ""
+    try:
+        for chunk in stream_gemini(
+            COMBINED_PROMPT.format(resume_text=prepared),
+            max_tokens=sum(max_tokens for _, max_tokens in SECTION_PROMPTS.values()),
+            response_schema=ANALYSIS_SCHEMA,
+        ):
+            buffer += chunk
+            yield {section: text for section, text in partial_json_fields(buffer).items()
+                   if section in SECTION_PROMPTS}
+    except Exception as exc:
+        if not _falls_back(exc):
+            raise
+        # The cut-off buffer won't parse, so every section is fetched separately below
+        buffer = ""
+
+    try:
+        result = json.loads(buffer)
+        result = {section: result[section] for section in SECTION_PROMPTS if result.get(section)}
+    except (ValueError, TypeError, AttributeError):
+        result = {}
+    missing = [section for section in SECTION_PROMPTS if section not in result]
+    if missing:
+        result.update(analyze_resume_parallel(resume_text, missing))
+    yield {section: result[section] for section in SECTION_PROMPTS}
+
+
+async def analyze_resume_async(resume_text, mode="combined"):
+    """Async variant of analyze_resume that runs in the shared worker pool"""
+    return await run_blocking(analyze_resume, resume_text, mode)
+
+
+KEYWORD_PROMPT = """Based on this resume or professional summary, extract the most relevant job titles and keywords for job searching.
+
+Profile: {summary}
+
+Keywords already found in it: {hints}
+
+Instructions:
+- Start from the keywords already found; drop any that don't fit and add missing job titles
+- Focus on job titles, roles, and technical skills
+- Prioritize terms that appear in job postings
+- Put the most relevant terms first
+- Return ONLY a comma-separated list
+
+Example: "Senior Software Engineer, Python Developer, Backend Engineer, Full Stack Developer"
+"""
+
+
+def keyword_prompt(summary, hints):
+    """Prompt asking Gemini to refine the taxonomy keywords for a resume or summary"""
+    return KEYWORD_PROMPT.format(summary=fit_to_budget(normalize_resume(summary)), hints=hints or "none")
+
+
+def generate_job_keywords(text, use_llm=KEYWORDS_USE_LLM):
+    """
+    Comma-separated job search keywords: job titles and top skills matched
+    against the local taxonomy, refined by Gemini only when use_llm is set
+    (or nothing in the taxonomy matched).
+    """
+    keywords = generate_keywords(text)
+    if keywords and not use_llm:
+        return keywords
+    try:
+        return ask_gemini(keyword_prompt(text, keywords), max_tokens=150).strip() or keywords
+    except Exception:
+        if not keywords:
+            raise
+        logger.warning("Keyword refinement failed; using taxonomy keywords", exc_info=True)
+        return keywords
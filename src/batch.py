@@ -0,0 +1,249 @@
+"""
+Bulk resume analysis: every PDF in a directory, with results appended to a
+JSONL file that doubles as a checkpoint.
+
+    python -m src.batch resumes/ --output analysis.jsonl
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+from src.analysis import analyze_resume_async
+from src.executor import run_blocking
+from src.metrics import span
+from src.pdf import extract_text_from_pdf
+from src.resilience import REQUEST_DEADLINE, deadline
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Resumes analyzed at once, and analyses started per minute (0 = unlimited)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_RPM = float(os.getenv("BATCH_RPM", "60"))
+# Processes extracting PDF text, started with the first batch and kept for the next
+BATCH_EXTRACT_WORKERS = int(os.getenv("BATCH_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+# Directory the analyze_resume_batch MCP tool may read resumes from and write results under; the tool is
+# refused while it is unset (the CLI reads and writes wherever it is pointed)
+BATCH_ROOT = os.getenv("BATCH_ROOT", "")
+
+
+class RateLimiter:
+    """Spaces acquisitions at least 60/per_minute seconds apart"""
+
+    def __init__(self, per_minute):
+        self.interval = 60 / per_minute if per_minute else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _within(path, root):
+    return os.path.commonpath([os.path.realpath(path), root]) == root
+
+
+def resolve_under_root(path, root):
+    """Absolute path for a path given relative to root, refusing anything (symlinks included) that leaves it"""
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if not _within(resolved, root):
+        raise ValueError(f"❌ Path is outside the batch root: {path}")
+    return resolved
+
+
+def find_pdfs(directory, recursive=False, root=None):
+    """PDF paths under directory, sorted; with a root, only files that really live under it"""
+    if not os.path.isdir(directory):
+        raise ValueError(f"❌ Not a directory: {directory}")
+    if recursive:
+        paths = [os.path.join(parent, name) for parent, _, names in os.walk(directory) for name in names]
+    else:
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+    return sorted(
+        path for path in paths
+        if path.lower().endswith(".pdf") and os.path.isfile(path)
+        and (root is None or _within(path, os.path.realpath(root)))
+    )
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def load_checkpoint(output):
+    """SHA-256 of every resume already analyzed successfully in an output file"""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves a partial last line
+                continue
+            if record.get("status") == "ok":
+                done.add(record["sha256"])
+    return done
+
+
+def plan_batch(directory, output, recursive=False, root=None):
+    """({path: sha256} of resumes still to analyze, number skipped as done or duplicate content)"""
+    finished = load_checkpoint(output)
+    pending = {}
+    skipped = 0
+    for path in find_pdfs(directory, recursive, root):
+        digest = file_digest(path)
+        if digest in finished:
+            skipped += 1
+        else:
+            finished.add(digest)
+            pending[path] = digest
+    return pending, skipped
+
+
+def _extract(path):
+    # Runs in a worker process; each resume is small, so extract it in that process only
+    return extract_text_from_pdf(path, workers=1)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """Extraction process pool shared by every batch, started on first use with `workers` processes"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn rather than fork: the MCP server and Streamlit hosts are multithreaded
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+async def _extract_in_pool(path, workers):
+    pool = _get_pool(workers)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, _extract, path)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time and extract this one in a thread
+        global _pool
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        return await run_blocking(_extract, path)
+
+
+async def process_resumes(directory, output=None, mode="combined", concurrency=BATCH_CONCURRENCY, rpm=BATCH_RPM,
+                          extract_workers=BATCH_EXTRACT_WORKERS, recursive=False, on_result=None, root=None):
+    """
+    Extract and analyze every PDF in directory, appending one JSON record per
+    resume to output (default: <directory>/analysis.jsonl). With a root, both
+    paths are taken relative to it and may not leave it.
+
+    Resumes whose content already has an "ok" record in output are skipped, so
+    an interrupted run picks up where it stopped. Text extraction runs in a
+    process pool kept for later batches, `extract_workers` resumes at a time;
+    at most `concurrency` analyses run at once and no more than `rpm` start
+    per minute. on_result(record, done, total) is awaited after every resume.
+    Returns counts for the run.
+    """
+    if root is not None:
+        directory = resolve_under_root(directory, root)
+        output = resolve_under_root(output, root) if output else None
+    output = output or os.path.join(directory, "analysis.jsonl")
+    started = time.monotonic()
+    pending, skipped = await run_blocking(plan_batch, directory, output, recursive, root)
+
+    counts = {"total": len(pending) + skipped, "skipped": skipped, "ok": 0, "error": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rpm)
+    write_lock = asyncio.Lock()
+    workers = max(1, extract_workers)
+    # The pool outlives this batch, so bound this batch's share of it here
+    extract_slots = asyncio.Semaphore(workers)
+
+    async def process(path, digest, out):
+        record = {"file": os.path.relpath(path, directory), "sha256": digest}
+        resume_started = time.monotonic()
+        with span("batch_resume") as attrs:
+            try:
+                record["stage"] = "extract"
+                async with extract_slots:
+                    text = await _extract_in_pool(path, workers)
+                record["chars"] = len(text)
+                if not text.strip():
+                    raise ValueError("❌ No text found in PDF")
+
+                record["stage"] = "analyze"
+                async with semaphore:
+                    await limiter.acquire()
+                    with deadline(REQUEST_DEADLINE):
+                        record["analysis"] = await analyze_resume_async(text, mode)
+                record["status"] = "ok"
+                del record["stage"]
+            except Exception as exc:
+                logger.warning("%s failed: %s", path, exc)
+                record.update(status="error", error=str(exc))
+            attrs["status"] = record["status"]
+        record["seconds"] = round(time.monotonic() - resume_started, 3)
+
+        async with write_lock:
+            # One flushed line per resume is the checkpoint
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            counts[record["status"]] += 1
+            done = counts["ok"] + counts["error"]
+        if on_result is not None:
+            await on_result(record, done, len(pending))
+
+    if pending:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "a", encoding="utf-8") as out:
+            await asyncio.gather(*(process(path, digest, out) for path, digest in pending.items()))
+
+    return {**counts, "output": output, "seconds": round(time.monotonic() - started, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze every resume PDF in a directory")
+    parser.add_argument("directory")
+    parser.add_argument("--output", help="JSONL results/checkpoint file (default: <directory>/analysis.jsonl)")
+    parser.add_argument("--mode", choices=["combined", "parallel"], default="combined")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=BATCH_RPM, help="Analyses started per minute (0 = unlimited)")
+    parser.add_argument("--workers", type=int, default=BATCH_EXTRACT_WORKERS, help="PDF extraction processes")
+    parser.add_argument("--recursive", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    async def report(record, done, total):
+        detail = f"{record['chars']} chars" if record["status"] == "ok" else record["error"]
+        print(f"[{done}/{total}] {record['file']}: {record['status']} ({detail}, {record['seconds']}s)")
+
+    summary = asyncio.run(process_resumes(args.directory, args.output, args.mode, args.concurrency, args.rpm,
+                                          args.workers, args.recursive, on_result=report))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SQLite file of cached Gemini responses, opened on first use; set GEMINI_CACHE_PATH="" to disable the cache
+GEMINI_CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", ".cache/gemini.sqlite3")
+GEMINI_CACHE_MAX_BYTES = int(os.getenv("GEMINI_CACHE_MAX_MB", "64")) * 1024 * 1024
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def make_key(*parts):
+    """Content-addressed cache key: SHA-256 over the JSON encoding of parts"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Disk-backed key/value cache in SQLite.
+
+    Entries stop being served after `ttl` seconds but are kept, so callers can
+    still fall back to them when a live call fails (get(allow_expired=True)).
+    The least recently used entries are evicted once the stored values exceed
+    `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes=GEMINI_CACHE_MAX_BYTES, ttl=GEMINI_CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "hit_bytes": 0, "written_bytes": 0, "evictions": 0}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+
+    def get(self, key, allow_expired=False):
+        """Return the cached value for key, or None if missing or expired (unless allow_expired)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (now - row[2] > self.ttl and not allow_expired):
+                self._counters["misses"] += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._counters["hits"] += 1
+            self._counters["hit_bytes"] += row[1]
+            return row[0]
+
+    def set(self, key, value):
+        """Store value under key, evicting least recently used entries past max_bytes"""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._counters["written_bytes"] += size
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._counters["evictions"] += len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Hit/miss/byte counters for this process plus the current size of the store"""
+        with self._lock:
+            entries, stored_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {**self._counters, "entries": entries, "stored_bytes": stored_bytes}
+
+
+_gemini_cache = None
+_gemini_cache_lock = threading.Lock()
+
+
+def get_gemini_cache():
+    """Shared cache for Gemini responses, opened on first use; None when GEMINI_CACHE_PATH="" disables it"""
+    global _gemini_cache
+    if not GEMINI_CACHE_PATH:
+        return None
+    if _gemini_cache is None:
+        with _gemini_cache_lock:
+            if _gemini_cache is None:
+                _gemini_cache = ResponseCache(GEMINI_CACHE_PATH)
+    return _gemini_cache
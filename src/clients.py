@@ -0,0 +1,52 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Optional endpoint overrides, e.g. for proxies or local fake servers
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+APIFY_API_URL = os.getenv("APIFY_API_URL")
+
+_gemini_client = None
+_apify_client = None
+_lock = threading.Lock()
+
+
+def _require_env(name):
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"❌ {name} not found in .env")
+    return value
+
+
+def get_gemini_client():
+    """
+    Process-wide Gemini client, created on first use.
+
+    google-genai is imported here rather than at module load, and the API key
+    is only checked when a Gemini call is actually made. Sharing one client
+    keeps its HTTP connection pool warm across calls and threads.
+    """
+    global _gemini_client
+    if _gemini_client is None:
+        with _lock:
+            if _gemini_client is None:
+                from google import genai
+
+                http_options = {"base_url": GEMINI_BASE_URL} if GEMINI_BASE_URL else None
+                _gemini_client = genai.Client(api_key=_require_env("GOOGLE_API_KEY"),
+                                              http_options=http_options)
+    return _gemini_client
+
+
+def get_apify_client():
+    """Process-wide Apify client, created on first use (see get_gemini_client)"""
+    global _apify_client
+    if _apify_client is None:
+        with _lock:
+            if _apify_client is None:
+                from apify_client import ApifyClient
+
+                _apify_client = ApifyClient(_require_env("APIFY_API_TOKEN"), api_url=APIFY_API_URL)
+    return _apify_client
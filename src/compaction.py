@@ -0,0 +1,126 @@
+import os
+import re
+import unicodedata
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Input-token cap for the resume part of any single prompt
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "4000"))
+
+SECTION_ALIASES = {
+    "summary": ["summary", "profile", "professional summary", "objective", "career objective", "about me"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "technologies",
+               "tools", "tools technologies", "tech stack", "skills tools"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "internships", "internship"],
+    "education": ["education", "academic background", "academics", "qualifications",
+                  "educational qualifications"],
+    "projects": ["projects", "academic projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses", "courses", "certifications courses"],
+    "achievements": ["achievements", "awards", "honors", "accomplishments", "publications"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies", "hobbies interests", "extracurricular activities"],
+    "references": ["references"],
+    "declaration": ["declaration"],
+    "personal": ["personal details", "personal information", "contact", "contact information"],
+}
+_HEADINGS = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+# Sections each prompt needs, in priority order; "header" is the text before the first heading
+PROMPT_SECTIONS = {
+    "summary": ["header", "summary", "skills", "experience", "education", "projects",
+                "certifications", "achievements", "languages"],
+    "skill_gaps": ["summary", "skills", "experience", "certifications", "education", "projects"],
+    "roadmap": ["summary", "skills", "experience", "projects", "certifications", "education"],
+    "keywords": ["summary", "skills", "experience", "projects"],
+}
+
+_BOILERPLATE = re.compile(
+    r"references (are )?available (up)?on request|curriculum vitae|^resume$|^cv$"
+    r"|^page \d+( of \d+)?$|i hereby declare",
+    re.IGNORECASE,
+)
+
+
+def normalize_resume(text):
+    """Normalize unicode and whitespace, and drop blank, repeated and boilerplate lines"""
+    text = unicodedata.normalize("NFKC", text)
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"\s+", " ", line).strip(" \t•●▪◦·-–|")
+        if not line or _BOILERPLATE.search(line):
+            continue
+        # Short lines (dates, cities, single skills) legitimately repeat across sections
+        key = line.lower()
+        if len(line.split()) >= 3:
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _heading(line):
+    if len(line) > 40:
+        return None
+    key = re.sub(r"[^a-z ]+", " ", line.lower())
+    return _HEADINGS.get(re.sub(r"\s+", " ", key).strip())
+
+
+def split_sections(text):
+    """Split normalized resume text into {section: text} using common heading names"""
+    sections = {"header": []}
+    current = "header"
+    for line in text.splitlines():
+        section = _heading(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return {name: "\n".join(lines) for name, lines in sections.items() if lines}
+
+
+def estimate_tokens(text):
+    """Cheap local estimate (~4 characters per token) used before asking the model"""
+    return (len(text) + 3) // 4
+
+
+def fit_to_budget(text, max_tokens=RESUME_TOKEN_BUDGET, count_tokens=None):
+    """
+    Trim text to at most max_tokens input tokens.
+
+    count_tokens is the model's token counter; it is only called when the
+    local estimate is close enough to the budget for the difference to matter.
+    """
+    estimate = estimate_tokens(text)
+    if count_tokens is None or estimate <= max_tokens * 0.8:
+        return text if estimate <= max_tokens else text[:max_tokens * 4]
+
+    for _ in range(3):
+        tokens = count_tokens(text)
+        if tokens <= max_tokens:
+            return text
+        text = text[:int(len(text) * max_tokens / tokens * 0.95)]
+    return text
+
+
+def prepare_resume(resume_text, purpose="summary", max_tokens=RESUME_TOKEN_BUDGET, count_tokens=None):
+    """
+    Compact resume text for one prompt: normalize, keep the sections that prompt
+    needs (in priority order) and cap it at max_tokens input tokens.
+    """
+    text = normalize_resume(resume_text)
+    sections = split_sections(text)
+    wanted = PROMPT_SECTIONS.get(purpose)
+    # Without recognizable headings there is nothing to select, so keep everything
+    if wanted is None or set(sections) <= {"header"}:
+        return fit_to_budget(text, max_tokens, count_tokens)
+
+    parts = [
+        f"{name.replace('_', ' ').title()}:\n{sections[name]}" if name != "header" else sections[name]
+        for name in wanted if name in sections
+    ]
+    return fit_to_budget("\n\n".join(parts), max_tokens, count_tokens)
@@ -0,0 +1,133 @@
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import replace
+from src.ranking import tokenize
+
+_COMPANY_SUFFIXES = re.compile(
+    r"\b(private|pvt|limited|ltd|inc|llc|llp|corp|corporation|co|company|technologies|solutions)\b\.?"
+)
+
+# 2^31 - 1 keeps (a * hash + b) inside uint64 for 31-bit hashes
+_PRIME = (1 << 31) - 1
+
+
+def _clean(text):
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9+# ]+", " ", str(text or "").lower())).strip()
+
+
+def exact_key(job):
+    """Normalized company + title + city, identical for the same posting across sources"""
+    company = _clean(_COMPANY_SUFFIXES.sub(" ", job.company.lower()))
+    city = _clean(job.location.split(",")[0])
+    return (company, _clean(job.title), city)
+
+
+def _shingles(text, size=3):
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures computed with vectorized universal hashing"""
+
+    def __init__(self, num_perm=128, seed=1):
+        # numpy is imported on first use to keep server startup fast
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.prime = np.uint64(_PRIME)
+        self.a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingles):
+        import numpy as np
+
+        hashes = np.fromiter((zlib.crc32(s.encode()) & 0x7FFFFFFF for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return ((np.outer(hashes, self.a) + self.b) % self.prime).min(axis=0)
+
+
+class Deduplicator:
+    """
+    Incremental cross-source deduplication of job postings.
+
+    A posting is a duplicate if its normalized company/title/city matches a
+    kept posting exactly, or if its description is a near-duplicate (MinHash
+    Jaccard estimate >= threshold, found via LSH banding) of a kept posting
+    at the same company and city with a similar title (employers reuse one
+    description across cities). Kept postings are copies of the JobRecords
+    whose `sources` list names every source they were seen in.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=16):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.jobs = []
+        self._exact = {}
+        self._keys = []
+        self._signatures = []
+        self._buckets = defaultdict(list)
+
+    def _find_near_duplicate(self, key, signature):
+        company, title, city = key
+        title = set(title.split())
+        seen = set()
+        for band in range(self.bands):
+            bucket = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for index in self._buckets.get(bucket, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+                other_company, other_title, other_city = self._keys[index]
+                if (company, city) != (other_company, other_city):
+                    continue
+                similarity = (self._signatures[index] == signature).mean()
+                other_title = set(other_title.split())
+                title_overlap = len(title & other_title) / max(len(title | other_title), 1)
+                if similarity >= self.threshold and title_overlap >= 0.5:
+                    return index
+        return None
+
+    def add(self, source, jobs):
+        """Add one source's postings and return the ones not seen before"""
+        unique = []
+        for job in jobs:
+            key = exact_key(job)
+            index = self._exact.get(key) if any(key) else None
+
+            shingles = _shingles(job.description)
+            signature = self.hasher.signature(shingles) if shingles else None
+            if index is None and signature is not None:
+                index = self._find_near_duplicate(key, signature)
+
+            if index is not None:
+                if source not in self.jobs[index].sources:
+                    self.jobs[index].sources.append(source)
+                continue
+
+            index = len(self.jobs)
+            # Copy, since records may be shared with the job cache
+            job = replace(job, sources=[source])
+            self.jobs.append(job)
+            self._keys.append(key)
+            self._signatures.append(signature)
+            if any(key):
+                self._exact[key] = index
+            if signature is not None:
+                for band in range(self.bands):
+                    self._buckets[(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())].append(index)
+            unique.append(job)
+        return unique
+
+
+def dedupe_jobs(jobs_by_source, threshold=0.8):
+    """Deduplicate {source: jobs} into one list of unique postings, each tagged with its sources"""
+    deduplicator = Deduplicator(threshold)
+    for source, jobs in jobs_by_source.items():
+        deduplicator.add(source, jobs)
+    return deduplicator.jobs
@@ -0,0 +1,359 @@
+import argparse
+import contextlib
+import fcntl
+import hashlib
+import itertools
+import json
+import os
+import threading
+from dotenv import load_dotenv
+from src.clients import get_gemini_client
+from src.ranking import job_text, tokenize
+from src.resilience import call_with_retries
+
+load_dotenv()
+
+# Directory of the semantic job index. Empty (the default) turns it off: when set, every fetched posting
+# is embedded, which with the gemini embedder is a paid API call per batch of new postings
+JOB_INDEX_PATH = os.getenv("JOB_INDEX_PATH", "")
+JOB_EMBEDDER = os.getenv("JOB_EMBEDDER", "gemini")
+
+# Rows scored per block during brute-force search, to bound temporary memory
+_SEARCH_BLOCK = 65536
+
+
+class HashingEmbedder:
+    """Deterministic local embedder (signed feature hashing of words and bigrams) for tests and offline use"""
+
+    name = "hashing"
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def embed(self, texts):
+        # numpy is imported on first use to keep server startup fast
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vectors[row, digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        return vectors
+
+
+class GeminiEmbedder:
+    """Gemini embedding model, batched"""
+
+    name = "gemini"
+
+    def __init__(self, model="gemini-embedding-001", dim=768, batch_size=100):
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+
+    def embed(self, texts):
+        import numpy as np
+
+        client = get_gemini_client()
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = call_with_retries("gemini_embed", lambda: client.models.embed_content(
+                model=self.model,
+                contents=texts[start:start + self.batch_size],
+                config={"output_dimensionality": self.dim},
+            ))
+            vectors.extend(embedding.values for embedding in response.embeddings)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+
+EMBEDDERS = {"hashing": HashingEmbedder, "gemini": GeminiEmbedder}
+
+
+def get_embedder(name=JOB_EMBEDDER):
+    if name not in EMBEDDERS:
+        raise ValueError(f"❌ Unknown embedder: {name}")
+    return EMBEDDERS[name]()
+
+
+def _normalize(vectors):
+    import numpy as np
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingIndex:
+    """
+    Append-only store of unit-length float32 vectors with an ID table.
+
+    Vectors live in a raw file that is memory-mapped read-only on open, so
+    opening is zero-copy regardless of size. Search is brute-force cosine
+    similarity, or IVF-style over the nearest partitions once
+    build_partitions() has been run.
+
+    Files under `path`: vectors.f32, ids.jsonl (one JSON record per row),
+    meta.json, and centroids.npy / partitions.npz after partitioning.
+
+    Several processes may share one index: writes hold an exclusive lock on
+    index.lock, and meta.json (replaced atomically after the vectors and IDs
+    are written) holds the committed row count. Each instance picks up rows
+    appended by other processes on its next add() or search().
+    """
+
+    def __init__(self, path, dim):
+        self.path = path
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._records = None
+        self._ids = None
+        os.makedirs(path, exist_ok=True)
+
+        meta = self._read_meta()
+        if meta and meta["dim"] != dim:
+            raise ValueError(f"❌ Index at {path} has dimension {meta['dim']}, not {dim}")
+        self.count = meta["count"] if meta else 0
+        self._map_vectors()
+        self._load_partitions()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _read_meta(self):
+        if not os.path.exists(self._file("meta.json")):
+            return None
+        with open(self._file("meta.json")) as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        tmp = self._file(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "count": self.count}, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the index shared with other processes (and threads of this one)"""
+        with self._lock, open(self._file("index.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Catch up with rows committed by other processes since this instance last looked"""
+        meta = self._read_meta()
+        count = meta["count"] if meta else 0
+        if count != self.count:
+            self.count = count
+            self._records = None
+            self._map_vectors()
+            self._load_partitions()
+
+    def _truncate_uncommitted(self):
+        """Drop vectors and IDs a crashed writer appended without committing them to meta.json (lock held)"""
+        vectors_path = self._file("vectors.f32")
+        if os.path.exists(vectors_path) and os.path.getsize(vectors_path) > self.count * self.dim * 4:
+            os.truncate(vectors_path, self.count * self.dim * 4)
+        ids_path = self._file("ids.jsonl")
+        if os.path.exists(ids_path):
+            with open(ids_path, "rb+") as f:
+                for _ in range(self.count):
+                    f.readline()
+                f.truncate()
+
+    def _map_vectors(self):
+        import numpy as np
+
+        if self.count:
+            self.vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r",
+                                     shape=(self.count, self.dim))
+        else:
+            self.vectors = np.empty((0, self.dim), dtype=np.float32)
+
+    def _load_partitions(self):
+        import numpy as np
+
+        self.centroids = None
+        if os.path.exists(self._file("centroids.npy")):
+            self.centroids = np.load(self._file("centroids.npy"), mmap_mode="r")
+            partitions = np.load(self._file("partitions.npz"))
+            self._partition_rows = partitions["rows"]
+            self._partition_offsets = partitions["offsets"]
+            self._partitioned_count = int(partitions["count"])
+
+    def records(self):
+        """ID-table records, in row order (loaded on first use)"""
+        if self._records is None:
+            self._records = []
+            if os.path.exists(self._file("ids.jsonl")):
+                with open(self._file("ids.jsonl")) as f:
+                    # Lines past the committed count may still be being written by another process
+                    self._records = [json.loads(line) for line in itertools.islice(f, self.count)]
+            self._ids = {record["id"] for record in self._records}
+        return self._records
+
+    def __contains__(self, item_id):
+        self.records()
+        return item_id in self._ids
+
+    def add(self, records, vectors):
+        """Append records (dicts with a unique "id") and their vectors, skipping IDs already indexed"""
+        import numpy as np
+
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._file_lock():
+            self._refresh()
+            self.records()
+            keep = []
+            for i, record in enumerate(records):
+                if record["id"] not in self._ids:
+                    self._ids.add(record["id"])
+                    keep.append(i)
+            if not keep:
+                return 0
+
+            self._truncate_uncommitted()
+            with open(self._file("vectors.f32"), "ab") as f:
+                f.write(_normalize(vectors[keep]).tobytes())
+            with open(self._file("ids.jsonl"), "a") as f:
+                for i in keep:
+                    f.write(json.dumps(records[i], ensure_ascii=False) + "\n")
+                    self._records.append(records[i])
+
+            self.count += len(keep)
+            self._write_meta()
+            self._map_vectors()
+            return len(keep)
+
+    def build_partitions(self, n_lists=None, iterations=10, sample_size=50000, seed=0):
+        """Cluster the vectors with k-means so search can scan only the nearest partitions"""
+        with self._file_lock():
+            self._refresh()
+            self._build_partitions(n_lists, iterations, sample_size, seed)
+
+    def _build_partitions(self, n_lists, iterations, sample_size, seed):
+        import numpy as np
+
+        if not self.count:
+            return
+        n_lists = n_lists or max(1, int(np.sqrt(self.count)))
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[np.sort(rng.choice(self.count, min(sample_size, self.count), replace=False))]
+        centroids = sample[rng.choice(len(sample), min(n_lists, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for k in range(len(centroids)):
+                members = sample[labels == k]
+                if len(members):
+                    centroids[k] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        assignments = np.concatenate([
+            np.argmax(self.vectors[start:start + _SEARCH_BLOCK] @ centroids.T, axis=1)
+            for start in range(0, self.count, _SEARCH_BLOCK)
+        ])
+        rows = np.argsort(assignments, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assignments[rows], np.arange(len(centroids) + 1))
+        np.save(self._file("centroids.npy"), centroids)
+        np.savez(self._file("partitions.npz"), rows=rows, offsets=offsets, count=self.count)
+        self._load_partitions()
+
+    def _candidate_rows(self, query, nprobe):
+        import numpy as np
+
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        rows = [self._partition_rows[self._partition_offsets[k]:self._partition_offsets[k + 1]] for k in nearest]
+        # Rows appended since partitioning aren't in any partition yet, so always scan them
+        rows.append(np.arange(self._partitioned_count, self.count))
+        return np.concatenate(rows)
+
+    def search(self, query_vector, top_k=10, nprobe=None):
+        """Top-k (record, cosine similarity) pairs for a query vector"""
+        import numpy as np
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, self.dim))[0]
+        with self._lock:
+            self._refresh()
+            # Consistent view of rows and records, even if another thread catches up meanwhile
+            count, vectors, records = self.count, self.vectors, self.records()
+            rows = np.sort(self._candidate_rows(query, nprobe)) if nprobe and self.centroids is not None else None
+        if not count or top_k <= 0:
+            return []
+
+        if rows is not None:
+            scores = vectors[rows] @ query
+        else:
+            scores = np.concatenate([
+                vectors[start:start + _SEARCH_BLOCK] @ query
+                for start in range(0, count, _SEARCH_BLOCK)
+            ])
+
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (records[rows[i] if rows is not None else i], float(scores[i]))
+            for i in top
+        ]
+
+
+_job_index = None
+_job_embedder = None
+_job_index_lock = threading.Lock()
+
+
+def get_job_index():
+    """Process-wide job embedding index and its embedder, opened on first use"""
+    global _job_index, _job_embedder
+    if not JOB_INDEX_PATH:
+        raise ValueError("❌ Semantic job index is disabled (set JOB_INDEX_PATH to enable it)")
+    with _job_index_lock:
+        if _job_index is None:
+            _job_embedder = get_embedder()
+            _job_index = EmbeddingIndex(os.path.join(JOB_INDEX_PATH, _job_embedder.name), _job_embedder.dim)
+        return _job_index, _job_embedder
+
+
+def index_jobs(source, jobs):
+    """Embed and append JobRecords that aren't in the job index yet"""
+    index, embedder = get_job_index()
+    new_jobs = {job.id: job for job in jobs if job.id not in index}
+    if not new_jobs:
+        return 0
+    records = [
+        {"id": job.id, "source": source, "title": job.title, "company": job.company,
+         "location": job.location, "url": job.url}
+        for job in new_jobs.values()
+    ]
+    vectors = embedder.embed([job_text(job) for job in new_jobs.values()])
+    return index.add(records, vectors)
+
+
+def semantic_match_jobs(resume_text, top_k=20, nprobe=None):
+    """Indexed postings closest in meaning to the resume"""
+    index, embedder = get_job_index()
+    query = embedder.embed([resume_text])[0]
+    return [{**record, "score": round(score, 4)} for record, score in index.search(query, top_k, nprobe)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the semantic job index at JOB_INDEX_PATH")
+    parser.add_argument("command", choices=["stats", "partition"],
+                        help="stats: show the index size; partition: (re)build the IVF partitions")
+    parser.add_argument("--lists", type=int, help="Partitions to build (default: sqrt of the vector count)")
+    parser.add_argument("--iterations", type=int, default=10, help="k-means iterations")
+    args = parser.parse_args()
+
+    index, embedder = get_job_index()
+    if args.command == "partition":
+        index.build_partitions(args.lists, args.iterations)
+    partitions = len(index.centroids) if index.centroids is not None else 0
+    print(json.dumps({"path": index.path, "embedder": embedder.name, "vectors": index.count,
+                      "partitions": partitions}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
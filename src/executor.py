@@ -0,0 +1,50 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bound on short blocking calls (Gemini, ranking, local stores) running at the same time
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "8"))
+# Upper bound on Apify actor runs in flight; they take minutes, so they get their own pool and can't
+# starve the short calls of threads
+ACTOR_CONCURRENCY = int(os.getenv("ACTOR_CONCURRENCY", "8"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENCY,
+    thread_name_prefix="job-mcp",
+)
+_actor_executor = ThreadPoolExecutor(
+    max_workers=ACTOR_CONCURRENCY,
+    thread_name_prefix="job-mcp-actor",
+)
+
+
+async def _run_in(executor, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Copy the caller's context so request deadlines follow the call into the pool
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call in the shared worker pool without blocking the event loop"""
+    return await _run_in(_executor, func, *args, **kwargs)
+
+
+async def run_actor_blocking(func, *args, **kwargs):
+    """Run a blocking actor run in the actor pool without blocking the event loop"""
+    return await _run_in(_actor_executor, func, *args, **kwargs)
+
+
+async def iterate_blocking(iterator):
+    """Consume a blocking iterator from async code, fetching each item in the worker pool"""
+    done = object()
+    while True:
+        item = await run_blocking(next, iterator, done)
+        if item is done:
+            return
+        yield item
@@ -1,48 +1,171 @@
-import fitz  # PyMuPDF
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from google import genai
-from apify_client import ApifyClient
+from src.clients import get_gemini_client
+from src.metrics import increment, record_gemini_usage, span
+from src.resilience import CALL_RETRIES, call_with_retries, check_deadline, record_outcome, remaining
+from src.cache import get_gemini_cache, make_key
+from src.pdf import extract_text_from_pdf, iter_pdf_pages
+from src.compaction import estimate_tokens
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-APIFY_API_TOKEN = os.getenv("APIFY_API_TOKEN")
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_TEMPERATURE = 0.5
+# Start a second, hedged request if the first hasn't answered after this many seconds (0 = off)
+GEMINI_HEDGE_AFTER = float(os.getenv("GEMINI_HEDGE_AFTER", "0"))
+
+# Cumulative token usage of ask_gemini calls in this process
+token_usage = {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+_token_usage_lock = threading.Lock()
 
-if not GOOGLE_API_KEY:
-    raise ValueError("❌ GOOGLE_API_KEY not found in .env")
 
-if not APIFY_API_TOKEN:
-    raise ValueError("❌ APIFY_API_TOKEN not found in .env")
+def count_tokens(text):
+    """Input tokens for text as counted by the model, falling back to a local estimate"""
+    try:
+        return get_gemini_client().models.count_tokens(model=GEMINI_MODEL, contents=text).total_tokens
+    except Exception:
+        return estimate_tokens(text)
 
-# Initialize Gemini client
-client = genai.Client(api_key=GOOGLE_API_KEY)
 
-# Initialize Apify client
-apify_client = ApifyClient(APIFY_API_TOKEN)
+def _record_usage(response):
+    usage = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(usage, "prompt_token_count", None) or 0
+    output_tokens = getattr(usage, "candidates_token_count", None) or 0
+    with _token_usage_lock:
+        token_usage["calls"] += 1
+        token_usage["input_tokens"] += input_tokens
+        token_usage["output_tokens"] += output_tokens
+    record_gemini_usage(input_tokens, output_tokens, model=GEMINI_MODEL)
+    logger.info("Gemini call: %d input tokens, %d output tokens", input_tokens, output_tokens)
+    return input_tokens, output_tokens
 
 
-def extract_text_from_pdf(uploaded_file):
-    """Extract text from uploaded PDF file"""
-    doc = fitz.open(stream=uploaded_file.read(), filetype="pdf")
+def _gemini_config(max_tokens, response_schema):
+    config = {
+        "max_output_tokens": max_tokens,
+        "temperature": GEMINI_TEMPERATURE,
+    }
+    if response_schema is not None:
+        config["response_mime_type"] = "application/json"
+        config["response_schema"] = response_schema
+    # Bound the HTTP request by whatever is left of the request deadline
+    left = remaining()
+    if left is not None:
+        config["http_options"] = {"timeout": max(1, int(left * 1000))}
+    return config
 
-    text = ""
-    for page in doc:
-        text += page.get_text()
 
-    return text
+def _cached_fallback(cache_key, use_cache):
+    """Last cached answer for a failed call, even if past its TTL"""
+    gemini_cache = get_gemini_cache() if use_cache else None
+    if gemini_cache is None:
+        return None
+    cached = gemini_cache.get(cache_key, allow_expired=True)
+    if cached is not None:
+        logger.warning("Gemini call failed, serving an expired cached response")
+        record_outcome("gemini", "fallback")
+    return cached
 
-def ask_gemini(prompt, max_tokens=500):
-    """Send prompt to Gemini and return response text"""
 
-    response = client.models.generate_content(
-    model="gemini-2.5-flash",
-    contents=prompt,
-    config={
-        "max_output_tokens": max_tokens,
-        "temperature": 0.5,
-    },
-)
+def ask_gemini(prompt, max_tokens=500, response_schema=None, use_cache=True):
+    """
+    Send prompt to Gemini and return response text (JSON text when response_schema is given).
 
+    Responses are served from the persistent cache for identical requests;
+    pass use_cache=False to always call the model. Calls are retried and bounded
+    by the request deadline; if they still fail, an expired cached answer is
+    returned when there is one.
+    """
+    cache_key = make_key(GEMINI_MODEL, prompt, max_tokens, GEMINI_TEMPERATURE, response_schema)
+    gemini_cache = get_gemini_cache() if use_cache else None
+    if gemini_cache is not None:
+        cached = gemini_cache.get(cache_key)
+        if cached is not None:
+            increment("gemini_requests_total", kind="generate", result="cache")
+            return cached
+
+    def call():
+        return get_gemini_client().models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=_gemini_config(max_tokens, response_schema),
+        )
+
+    with span("gemini", kind="generate") as attrs:
+        try:
+            response = call_with_retries("gemini", call, hedge_after=GEMINI_HEDGE_AFTER)
+        except Exception:
+            cached = _cached_fallback(cache_key, use_cache)
+            if cached is None:
+                raise
+            increment("gemini_requests_total", kind="generate", result="fallback")
+            return cached
+        attrs["input_tokens"], attrs["output_tokens"] = _record_usage(response)
+    increment("gemini_requests_total", kind="generate", result="live")
+
+    if gemini_cache is not None and response.text:
+        gemini_cache.set(cache_key, response.text)
     return response.text
+
+
+def stream_gemini(prompt, max_tokens=500, response_schema=None, use_cache=True):
+    """
+    Streaming variant of ask_gemini: yields response text chunks as they are generated.
+
+    A cached response is yielded as a single chunk; a completed stream is cached
+    under the same key ask_gemini uses.
+    """
+    cache_key = make_key(GEMINI_MODEL, prompt, max_tokens, GEMINI_TEMPERATURE, response_schema)
+    gemini_cache = get_gemini_cache() if use_cache else None
+    if gemini_cache is not None:
+        cached = gemini_cache.get(cache_key)
+        if cached is not None:
+            increment("gemini_requests_total", kind="stream", result="cache")
+            yield cached
+            return
+
+    def open_stream():
+        # The request is only sent on the first next(), so retries cover everything up to the first chunk
+        stream = iter(get_gemini_client().models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=_gemini_config(max_tokens, response_schema),
+        ))
+        return next(stream, None), stream
+
+    with span("gemini", kind="stream") as attrs:
+        started = time.perf_counter()
+        try:
+            chunk, stream = call_with_retries("gemini_stream", open_stream, retries=CALL_RETRIES)
+        except Exception:
+            cached = _cached_fallback(cache_key, use_cache)
+            if cached is None:
+                raise
+            increment("gemini_requests_total", kind="stream", result="fallback")
+            yield cached
+            return
+        attrs["first_chunk_seconds"] = round(time.perf_counter() - started, 4)
+
+        parts = []
+        last = None
+        while chunk is not None:
+            last = chunk
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+            check_deadline()
+            chunk = next(stream, None)
+
+        # Usage totals arrive on the final chunk
+        if last is not None:
+            attrs["input_tokens"], attrs["output_tokens"] = _record_usage(last)
+    increment("gemini_requests_total", kind="stream", result="live")
+
+    if gemini_cache is not None and parts:
+        gemini_cache.set(cache_key, "".join(parts))
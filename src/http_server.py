@@ -0,0 +1,150 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+from mcp.server.transport_security import TransportSecuritySettings
+from starlette.responses import JSONResponse
+from src.metrics import increment
+
+load_dotenv()
+
+# Transport for mcp-server.py: "stdio" (one client per process), "streamable-http" or "sse"
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("MCP_PORT", "8000"))
+# Server processes for the HTTP transports; more than one makes streamable HTTP stateless
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+# Requests one client may have in flight (0 = unlimited); extra ones wait up to MCP_CLIENT_QUEUE_TIMEOUT
+# seconds for a slot and are then turned away with a 429. The limit is kept per worker process, so with
+# MCP_WORKERS > 1 a client may have up to MCP_CLIENT_CONCURRENCY requests in flight in each worker
+MCP_CLIENT_CONCURRENCY = int(os.getenv("MCP_CLIENT_CONCURRENCY", "4"))
+MCP_CLIENT_QUEUE_TIMEOUT = float(os.getenv("MCP_CLIENT_QUEUE_TIMEOUT", "30"))
+# Request header naming the client; without it the MCP session, then the remote address, is the client
+MCP_CLIENT_HEADER = os.getenv("MCP_CLIENT_HEADER", "x-client-id")
+# Comma-separated Host header values clients may use (e.g. "jobs.example.com,10.0.0.5:*"); required when binding
+# to a non-loopback address. Allowed Origins default to http(s):// plus each allowed host
+MCP_ALLOWED_HOSTS = os.getenv("MCP_ALLOWED_HOSTS", "")
+MCP_ALLOWED_ORIGINS = os.getenv("MCP_ALLOWED_ORIGINS", "")
+
+HTTP_TRANSPORTS = ("streamable-http", "sse")
+_LOOPBACK = ("127.0.0.1", "localhost", "::1")
+_LOOPBACK_HOSTS = ["127.0.0.1:*", "localhost:*", "[::1]:*"]
+
+
+class ClientLimiter:
+    """
+    Caps the POST requests (tool calls and other JSON-RPC requests) each
+    client has in flight, so one busy agent can't take every worker thread
+    and upstream connection from the others. Over the cap, requests queue
+    for up to `queue_timeout` seconds before being rejected with a 429.
+
+    Streamable HTTP holds a POST open until its response is sent; SSE answers
+    POSTs right away, so there the limit only paces submissions.
+
+    Counts live in the worker's memory: each worker process enforces the
+    limit on its own, so a client's overall cap is `limit` times the number
+    of workers its requests are spread over.
+    """
+
+    def __init__(self, limit=MCP_CLIENT_CONCURRENCY, queue_timeout=MCP_CLIENT_QUEUE_TIMEOUT,
+                 header=MCP_CLIENT_HEADER):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.header = header.lower().encode("latin-1")
+        self._clients = {}  # client -> {"semaphore", "active", "waiting"}; dropped once idle
+        self._counters = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    def client_id(self, scope):
+        headers = dict(scope.get("headers") or ())
+        for name in (self.header, b"mcp-session-id"):
+            if headers.get(name):
+                return headers[name].decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def wrap(self, app):
+        """ASGI app that applies the limit in front of app"""
+        async def limited(scope, receive, send):
+            if scope["type"] != "http" or scope["method"] != "POST" or not self.limit:
+                await app(scope, receive, send)
+                return
+            client = self.client_id(scope)
+            # All requests of a worker run on one event loop, so the bookkeeping needs no lock
+            state = self._clients.setdefault(
+                client, {"semaphore": asyncio.Semaphore(self.limit), "active": 0, "waiting": 0}
+            )
+            state["waiting"] += 1
+            try:
+                if state["semaphore"].locked():
+                    self._counters["queued"] += 1
+                try:
+                    async with asyncio.timeout(self.queue_timeout):
+                        await state["semaphore"].acquire()
+                except TimeoutError:
+                    self._counters["rejected"] += 1
+                    increment("mcp_client_rejections_total", help="Requests turned away by the per-client limit")
+                    response = JSONResponse(
+                        {"jsonrpc": "2.0", "id": None,
+                         "error": {"code": -32000, "message": "❌ Too many concurrent requests; retry shortly"}},
+                        status_code=429, headers={"Retry-After": str(max(1, round(self.queue_timeout)))},
+                    )
+                    await response(scope, receive, send)
+                    return
+                finally:
+                    state["waiting"] -= 1
+                self._counters["admitted"] += 1
+                state["active"] += 1
+                try:
+                    await app(scope, receive, send)
+                finally:
+                    state["active"] -= 1
+                    state["semaphore"].release()
+            finally:
+                if not state["active"] and not state["waiting"]:
+                    self._clients.pop(client, None)
+
+        return limited
+
+    def stats(self):
+        """Limit settings, counters and current load (this worker process only)"""
+        return {
+            "limit": self.limit,
+            "queue_timeout": self.queue_timeout,
+            **self._counters,
+            "clients": len(self._clients),
+            "active": sum(state["active"] for state in self._clients.values()),
+            "waiting": sum(state["waiting"] for state in self._clients.values()),
+        }
+
+
+# Shared by every HTTP session in this process
+client_limiter = ClientLimiter()
+
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def transport_security(host=MCP_HOST, allowed_hosts=MCP_ALLOWED_HOSTS, allowed_origins=MCP_ALLOWED_ORIGINS):
+    """DNS-rebinding protection for the HTTP transports: only the configured Host and Origin headers are accepted"""
+    hosts = _split(allowed_hosts)
+    if host in _LOOPBACK:
+        hosts += _LOOPBACK_HOSTS
+    elif not hosts:
+        raise ValueError(f"❌ Set MCP_ALLOWED_HOSTS to the host names clients use to reach the server on {host} "
+                         "(e.g. jobs.example.com,jobs.example.com:*)")
+    origins = _split(allowed_origins) or [f"{scheme}://{name}" for name in hosts for scheme in ("http", "https")]
+    return TransportSecuritySettings(enable_dns_rebinding_protection=True, allowed_hosts=hosts,
+                                     allowed_origins=origins)
+
+
+def build_app(mcp, transport=MCP_TRANSPORT, host=MCP_HOST, workers=MCP_WORKERS):
+    """ASGI app serving a FastMCP server over an HTTP transport, behind the per-client limit"""
+    if transport not in HTTP_TRANSPORTS:
+        raise ValueError(f"❌ Unknown HTTP transport: {transport} (expected one of {', '.join(HTTP_TRANSPORTS)})")
+    if transport == "sse" and workers > 1:
+        raise ValueError("❌ SSE sessions live in one process; use streamable-http for more than one worker")
+    # Sessions are kept in a worker's memory, so with several workers each request has to stand alone
+    mcp.settings.stateless_http = workers > 1
+    mcp.settings.transport_security = transport_security(host)
+    app = mcp.streamable_http_app() if transport == "streamable-http" else mcp.sse_app()
+    return client_limiter.wrap(app)
@@ -1,13 +1,112 @@
 from dotenv import load_dotenv
-from apify_client import ApifyClient
+from concurrent.futures import ThreadPoolExecutor
+from src.clients import get_apify_client
+from src.job_cache import job_cache, job_cache_key
+from src.metrics import record_actor_items, span
+from src.resilience import call_with_retries, check_deadline, record_outcome, remaining
+from src.embeddings import JOB_INDEX_PATH, index_jobs
+from src.job_store import JOB_STORE_PATH, store_jobs
+from src.records import FIELD_MAP, JobRecord
+import json
+import logging
 import os
+import time
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-apify_client = ApifyClient(os.getenv("APIFY_API_TOKEN"))
+# Registry of job sources: name -> fetch function(search_query, location, rows) -> [JobRecord]
+JOB_SOURCES = {}
 
-def fetch_linkedin_jobs(search_query,location="india",rows=60):
-    run_input = {
+
+def register_source(name):
+    """Decorator that registers a fetch function as a job source for the query planner"""
+    def decorator(func):
+        JOB_SOURCES[name] = func
+        return func
+    return decorator
+
+
+# Callbacks run with (source, jobs) after every live actor run, off the request path
+_fetch_listeners = []
+_listener_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-listeners")
+
+
+def add_fetch_listener(callback):
+    """Register callback(source, jobs) to receive the results of every live actor run"""
+    _fetch_listeners.append(callback)
+
+
+# Callbacks run with (source, search_query, location, rows) for every cacheable (interactive) fetch
+_query_listeners = []
+
+
+def add_query_listener(callback):
+    """Register callback(source, search_query, location, rows) to see the searches users run"""
+    _query_listeners.append(callback)
+
+
+def _run_listener(callback, *args):
+    try:
+        callback(*args)
+    except Exception:
+        logger.exception("Job listener %r failed", callback)
+
+
+# Actor runs are paid for, so retry them less eagerly than LLM calls; hedging is off unless set
+ACTOR_RETRIES = int(os.getenv("ACTOR_RETRIES", "1"))
+ACTOR_HEDGE_AFTER = float(os.getenv("ACTOR_HEDGE_AFTER", "0"))
+
+
+def _cached(source, run_actor, search_query, location, rows, use_cache, stale_while_revalidate):
+    def run():
+        jobs = call_with_retries(f"actor:{source}", lambda: run_actor(search_query, location, rows),
+                                 retries=ACTOR_RETRIES, hedge_after=ACTOR_HEDGE_AFTER)
+        for callback in _fetch_listeners:
+            _listener_pool.submit(_run_listener, callback, source, jobs)
+        return jobs
+
+    if not use_cache:
+        return run()
+    for callback in _query_listeners:
+        _run_listener(callback, source, search_query, location, rows)
+    key = job_cache_key(source, search_query, location, rows)
+    try:
+        return job_cache.get_or_fetch(key, run, stale_while_revalidate=stale_while_revalidate,
+                                      timeout=remaining())
+    except Exception:
+        # Out of time or out of retries: degrade to the last result for this search, however old
+        entry = job_cache.peek(key)
+        if entry is None:
+            raise
+        logger.warning("Serving cached %s jobs from %.0fs ago", source, time.time() - entry[0])
+        record_outcome(f"actor:{source}", "fallback")
+        return list(entry[1])
+
+
+def refresh_jobs(source, search_query, location="india", rows=60):
+    """Run a live fetch for a search and store it in the job cache, so the next user gets a fresh hit"""
+    key = job_cache_key(source, search_query, location, rows)
+    return job_cache.refresh(key, lambda: JOB_SOURCES[source](search_query, location, rows, use_cache=False),
+                             timeout=remaining())
+
+
+@register_source("linkedin")
+def fetch_linkedin_jobs(search_query,location="india",rows=60,use_cache=True,stale_while_revalidate=True):
+    """LinkedIn jobs, served from the shared job cache when the same search ran recently"""
+    return _cached("linkedin", _run_linkedin_actor, search_query, location, rows,
+                   use_cache, stale_while_revalidate)
+
+
+@register_source("naukri")
+def fetch_naukri_jobs(search_query,location="india",rows=60,use_cache=True,stale_while_revalidate=True):
+    """Naukri jobs, served from the shared job cache when the same search ran recently"""
+    return _cached("naukri", _run_naukri_actor, search_query, location, rows,
+                   use_cache, stale_while_revalidate)
+
+
+def _linkedin_input(search_query,location,rows):
+    return {
         "title" : search_query,
         "location":location,
         "rows":rows,
@@ -17,21 +116,111 @@ def fetch_linkedin_jobs(search_query,location="india",rows=60):
         }
     }
 
-    run = apify_client.actor("BHzefUZlZRKWxkTck").call(run_input=run_input)
-    jobs = list(apify_client.dataset(run["defaultDatasetId"]).iterate_items())
-    return jobs
-
 
-def fetch_naukri_jobs(search_query,location="india",rows=60):
-    run_input = {
+def _naukri_input(search_query,location,rows):
+    return {
         "keyword" : search_query,
-        "maxJobs" : 60,
+        "maxJobs" : rows,
         "freshness" : "all",
         "sortby" : "relevance",
         "experience" :"all"
     }
 
-    run = apify_client.actor("alpcnRV9YI9lYVPWk").call(run_input=run_input)
-    jobs = list(apify_client.dataset(run["defaultDatasetId"]).iterate_items())
-    return jobs
+
+# Actor ID and input builder per source
+ACTORS = {
+    "linkedin": ("BHzefUZlZRKWxkTck", _linkedin_input),
+    "naukri": ("alpcnRV9YI9lYVPWk", _naukri_input),
+}
+
+ACTOR_POLL_SECONDS = int(os.getenv("ACTOR_POLL_SECONDS", "2"))
+ACTOR_PAGE_SIZE = 100
+_TERMINAL_STATUSES = {"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"}
+
+
+def iter_actor_items(actor_id, run_input, limit=None, fields=None, poll_seconds=ACTOR_POLL_SECONDS):
+    """
+    Start an actor run and yield its dataset items as they are written.
+
+    The run is aborted as soon as `limit` items have been yielded, if the
+    consumer stops iterating early, or when the request deadline passes, so we
+    don't pay for rows nobody reads. A run that ends in any status other than
+    SUCCEEDED before `limit` items were read raises, so it can be retried
+    instead of being cached as a complete result.
+    """
+    check_deadline()
+    apify_client = get_apify_client()
+    run = apify_client.actor(actor_id).start(run_input=run_input, max_items=limit)
+    run_client = apify_client.run(run["id"])
+    dataset = apify_client.dataset(run["defaultDatasetId"])
+    offset = 0
+    finished = run.get("status") in _TERMINAL_STATUSES
+    try:
+        while limit is None or offset < limit:
+            # Raising here aborts the run in the finally block below
+            check_deadline()
+            page_size = ACTOR_PAGE_SIZE if limit is None else min(ACTOR_PAGE_SIZE, limit - offset)
+            items = dataset.list_items(offset=offset, limit=page_size, fields=fields).items
+            for item in items:
+                offset += 1
+                yield item
+            if items:
+                continue
+            if finished:
+                # A failed, aborted or timed-out run leaves a partial dataset; don't pass it off as complete
+                if run.get("status") != "SUCCEEDED":
+                    raise RuntimeError(f"❌ Actor run {run['id']} finished with status {run.get('status')}")
+                return
+            # Long-polls: returns as soon as the run finishes, or after poll_seconds
+            left = remaining()
+            wait_secs = poll_seconds if left is None else max(1, min(poll_seconds, int(left)))
+            run = run_client.wait_for_finish(wait_secs=wait_secs) or run
+            finished = run.get("status") in _TERMINAL_STATUSES
+    finally:
+        if not finished:
+            try:
+                run_client.abort()
+            except Exception:
+                logger.warning("Could not abort actor run %s", run["id"], exc_info=True)
+
+
+def stream_jobs(source,search_query,location="india",rows=60):
+    """Yield JobRecords from a live actor run as they arrive, stopping the run after `rows` jobs"""
+    actor_id, build_input = ACTORS[source]
+    mapping = FIELD_MAP.get(source)
+    fields = sorted({key for keys in mapping.values() for key in keys}) if mapping else None
+    with span("actor_run", source=source) as attrs:
+        items = size = 0
+        try:
+            for item in iter_actor_items(actor_id, build_input(search_query, location, rows), limit=rows, fields=fields):
+                items += 1
+                size += len(json.dumps(item, default=str))
+                yield JobRecord.from_raw(source, item)
+        finally:
+            attrs.update(items=items, bytes=size)
+            record_actor_items(items, size, source=source)
+
+
+def _run_linkedin_actor(search_query,location="india",rows=60):
+    return list(stream_jobs("linkedin", search_query, location, rows))
+
+
+def _run_naukri_actor(search_query,location="india",rows=60):
+    return list(stream_jobs("naukri", search_query, location, rows))
+
+
+# New postings are embedded into the semantic job index as they arrive
+if JOB_INDEX_PATH:
+    add_fetch_listener(index_jobs)
+# ...and every posting is kept in the local full-text store for search_jobs_local
+if JOB_STORE_PATH:
+    add_fetch_listener(store_jobs)
+
+
+def _resolve_sources(sources):
+    names = list(sources or JOB_SOURCES)
+    unknown = [name for name in names if name not in JOB_SOURCES]
+    if unknown:
+        raise ValueError(f"❌ Unknown job source(s): {', '.join(unknown)}")
+    return names
 
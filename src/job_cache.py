@@ -0,0 +1,128 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Fresh for JOB_CACHE_TTL seconds; afterwards served stale (while refreshing) up to JOB_CACHE_STALE_TTL
+JOB_CACHE_TTL = int(os.getenv("JOB_CACHE_TTL", "3600"))
+JOB_CACHE_STALE_TTL = int(os.getenv("JOB_CACHE_STALE_TTL", str(6 * 3600)))
+JOB_CACHE_MAX_ENTRIES = int(os.getenv("JOB_CACHE_MAX_ENTRIES", "256"))
+
+
+def normalize_keywords(keywords):
+    """Lowercase, collapse whitespace, and sort/dedupe the comma-separated terms"""
+    terms = {re.sub(r"\s+", " ", term).strip() for term in keywords.lower().split(",")}
+    return ", ".join(sorted(term for term in terms if term))
+
+
+def job_cache_key(source, keywords, location, rows):
+    return (source, normalize_keywords(keywords), re.sub(r"\s+", " ", location.lower()).strip(), rows)
+
+
+class JobCache:
+    """
+    In-process TTL cache for job listings.
+
+    Concurrent misses on the same key share one in-flight fetch, and entries
+    past their TTL can be served stale while a background refresh runs.
+    """
+
+    def __init__(self, ttl=JOB_CACHE_TTL, stale_ttl=JOB_CACHE_STALE_TTL, max_entries=JOB_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (fetched_at, jobs)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="job-cache-refresh")
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "prefetches": 0}
+
+    def get_or_fetch(self, key, fetch, stale_while_revalidate=True, timeout=None):
+        """
+        Return cached jobs for key, calling fetch() at most once across concurrent callers on a miss.
+
+        Callers waiting on another caller's fetch give up after `timeout` seconds (TimeoutError).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return list(entry[1])
+                if stale_while_revalidate and age < self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._counters["stale_hits"] += 1
+                    if key not in self._inflight:
+                        self._counters["refreshes"] += 1
+                        self._inflight[key] = Future()
+                        self._refresh_pool.submit(self._fetch, key, fetch)
+                    return list(entry[1])
+
+            future = self._inflight.get(key)
+            if future is None:
+                self._counters["misses"] += 1
+                future = self._inflight[key] = Future()
+                owner = True
+            else:
+                self._counters["coalesced"] += 1
+                owner = False
+
+        if owner:
+            self._fetch(key, fetch)
+        return list(future.result(timeout=timeout))
+
+    def refresh(self, key, fetch, timeout=None):
+        """Fetch key now whatever the age of its entry, joining a fetch already in flight for it"""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self._counters["prefetches"] += 1
+                future = self._inflight[key] = Future()
+
+        if owner:
+            self._fetch(key, fetch)
+        return list(future.result(timeout=timeout))
+
+    def _fetch(self, key, fetch):
+        future = self._inflight[key]
+        try:
+            jobs = fetch()
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            return
+
+        with self._lock:
+            self._entries[key] = (time.time(), jobs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(jobs)
+
+    def peek(self, key):
+        """Return (fetched_at, jobs) for key regardless of age, or None"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "inflight": len(self._inflight)}
+
+
+# Shared across MCP sessions and Streamlit users within one process
+job_cache = JobCache()
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+from src.metrics import span
+from src.ranking import tokenize
+from src.records import JobRecord
+
+load_dotenv()
+
+# SQLite file of every fetched posting, opened on first use; set JOB_STORE_PATH="" to disable the store
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", ".cache/jobs.sqlite3")
+# Local results count as fresh while their newest match was seen in the last JOB_STORE_FRESH_TTL seconds
+JOB_STORE_FRESH_TTL = int(os.getenv("JOB_STORE_FRESH_TTL", str(24 * 3600)))
+# Fewer local matches than this counts as thin coverage
+JOB_STORE_MIN_RESULTS = int(os.getenv("JOB_STORE_MIN_RESULTS", "10"))
+# Postings not seen in any fetch for this long are dropped
+JOB_STORE_RETENTION = int(os.getenv("JOB_STORE_RETENTION", str(30 * 24 * 3600)))
+
+_COLUMNS = ("id", "source", "title", "company", "location", "url", "description", "skills", "posted_at")
+
+
+def match_expression(keywords):
+    """
+    FTS5 query for comma-separated keywords: every word of a term must match,
+    any term may. Words are quoted so user input can't inject FTS syntax.
+    """
+    terms = []
+    for term in keywords.split(","):
+        words = tokenize(term)
+        if words:
+            terms.append("(" + " ".join(f'"{word}"' for word in words) + ")")
+    return " OR ".join(terms)
+
+
+class JobStore:
+    """
+    Every fetched posting, upserted into SQLite with an FTS5 index over
+    title, company and description, so keyword searches can be answered
+    locally without an actor run.
+
+    Rows keep when they were first and last seen in a live fetch; the last
+    seen time decides whether local results are fresh enough to serve.
+    """
+
+    def __init__(self, path, retention=JOB_STORE_RETENTION):
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                company TEXT NOT NULL,
+                location TEXT NOT NULL,
+                url TEXT NOT NULL,
+                description TEXT NOT NULL,
+                skills TEXT NOT NULL,
+                posted_at TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_last_seen ON jobs(last_seen);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+                title, company, description,
+                content='jobs', content_rowid='rowid', tokenize='porter unicode61'
+            );
+            -- Keep the external-content index in step with the table
+            CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+                INSERT INTO jobs_fts(rowid, title, company, description)
+                VALUES (new.rowid, new.title, new.company, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+                INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description)
+                VALUES ('delete', old.rowid, old.title, old.company, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE OF title, company, description ON jobs BEGIN
+                INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description)
+                VALUES ('delete', old.rowid, old.title, old.company, old.description);
+                INSERT INTO jobs_fts(rowid, title, company, description)
+                VALUES (new.rowid, new.title, new.company, new.description);
+            END;
+        """)
+
+    def upsert(self, source, jobs):
+        """Insert new postings and refresh known ones (fields, sources, last seen); returns how many were new"""
+        jobs = [JobRecord.coerce(job) for job in jobs]
+        if not jobs:
+            return 0
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                placeholders = ",".join("?" * len(jobs))
+                known = dict(self._conn.execute(
+                    f"SELECT id, sources FROM jobs WHERE id IN ({placeholders})", [job.id for job in jobs]
+                ).fetchall())
+                rows = []
+                for job in jobs:
+                    sources = json.loads(known.get(job.id, "[]"))
+                    sources += [name for name in job.sources or [source] if name not in sources]
+                    rows.append((*(getattr(job, column) for column in _COLUMNS), json.dumps(sources), now, now))
+                self._conn.executemany(f"""
+                    INSERT INTO jobs ({", ".join(_COLUMNS)}, sources, first_seen, last_seen)
+                    VALUES ({", ".join("?" * (len(_COLUMNS) + 3))})
+                    ON CONFLICT(id) DO UPDATE SET
+                        title = excluded.title, company = excluded.company, location = excluded.location,
+                        url = excluded.url, description = excluded.description, skills = excluded.skills,
+                        posted_at = excluded.posted_at, sources = excluded.sources, last_seen = excluded.last_seen
+                """, rows)
+                if self.retention:
+                    self._conn.execute("DELETE FROM jobs WHERE last_seen < ?", (now - self.retention,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len({job.id for job in jobs} - known.keys())
+
+    def search(self, keywords, location="", limit=20):
+        """
+        Best full-text matches for the keywords (optionally within a location),
+        as (JobRecord, last_seen) pairs, plus how many postings matched in total.
+        """
+        expression = match_expression(keywords)
+        if not expression:
+            return [], 0
+        where = "jobs_fts MATCH ?"
+        params = [expression]
+        if location.strip():
+            where += " AND jobs.location LIKE ? ESCAPE '\\'"
+            escaped = location.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+
+        with span("job_store_search") as attrs, self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM jobs_fts JOIN jobs ON jobs.rowid = jobs_fts.rowid WHERE {where}", params
+            ).fetchone()[0]
+            # bm25() is lower for better matches; a hit in the title counts most
+            rows = self._conn.execute(f"""
+                SELECT {", ".join(f"jobs.{column}" for column in _COLUMNS)}, jobs.sources, jobs.last_seen
+                FROM jobs_fts JOIN jobs ON jobs.rowid = jobs_fts.rowid
+                WHERE {where}
+                ORDER BY bm25(jobs_fts, 10.0, 3.0, 1.0)
+                LIMIT ?
+            """, params + [limit]).fetchall()
+            attrs.update(matches=total, returned=len(rows))
+
+        results = []
+        for row in rows:
+            values = dict(zip(_COLUMNS, row))
+            results.append((JobRecord(**values, sources=json.loads(row[-2])), row[-1]))
+        return results, total
+
+    def stats(self):
+        """Stored postings per source and the age of the newest/oldest sighting"""
+        now = time.time()
+        with self._lock:
+            total, newest, oldest = self._conn.execute(
+                "SELECT COUNT(*), MAX(last_seen), MIN(last_seen) FROM jobs"
+            ).fetchone()
+            per_source = dict(self._conn.execute("SELECT source, COUNT(*) FROM jobs GROUP BY source").fetchall())
+        return {
+            "jobs": total,
+            "per_source": per_source,
+            "newest_age_seconds": round(now - newest) if newest else None,
+            "oldest_age_seconds": round(now - oldest) if oldest else None,
+        }
+
+
+def needs_live_fetch(results, total, fresh_ttl=JOB_STORE_FRESH_TTL, min_results=JOB_STORE_MIN_RESULTS):
+    """Why local results aren't enough ("thin" or "stale"), or None when they are"""
+    if not results or total < min_results:
+        return "thin"
+    if time.time() - max(last_seen for _, last_seen in results) > fresh_ttl:
+        return "stale"
+    return None
+
+
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """Shared store of every fetched posting, opened on first use; None when JOB_STORE_PATH="" disables it"""
+    global _job_store
+    if not JOB_STORE_PATH:
+        return None
+    if _job_store is None:
+        with _job_store_lock:
+            if _job_store is None:
+                _job_store = JobStore(JOB_STORE_PATH)
+    return _job_store
+
+
+def store_jobs(source, jobs):
+    """Upsert fetched JobRecords into the shared job store"""
+    return get_job_store().upsert(source, jobs)
@@ -0,0 +1,197 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# USD per million tokens, for the cost counters (defaults: gemini-2.5-flash list price)
+GEMINI_INPUT_COST_PER_M = float(os.getenv("GEMINI_INPUT_COST_PER_M", "0.30"))
+GEMINI_OUTPUT_COST_PER_M = float(os.getenv("GEMINI_OUTPUT_COST_PER_M", "2.50"))
+# USD per thousand actor dataset items; depends on the actor's pricing, so off by default
+APIFY_COST_PER_1K_ITEMS = float(os.getenv("APIFY_COST_PER_1K_ITEMS", "0"))
+
+METRIC_PREFIX = "job_mcp_"
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_lock = threading.Lock()
+_counters = defaultdict(float)  # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_help = {}
+
+# Spans finished inside trace() are also appended to the active list, for per-run breakdowns
+_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def increment(metric, value=1, help=None, **labels):
+    """Add value to a counter"""
+    with _lock:
+        _counters[_key(metric, labels)] += value
+        if help:
+            _help.setdefault(metric, help)
+
+
+def observe(metric, seconds, help=None, **labels):
+    """Record one duration in a histogram"""
+    with _lock:
+        histogram = _histograms.setdefault(_key(metric, labels), [0] * len(_BUCKETS) + [0.0, 0])
+        for i, bound in enumerate(_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+        histogram[-2] += seconds
+        histogram[-1] += 1
+        if help:
+            _help.setdefault(metric, help)
+
+
+@contextmanager
+def trace(spans=None):
+    """Collect the spans finished inside the block (including in worker threads with a copied context)"""
+    spans = [] if spans is None else spans
+    token = _trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def span(stage, **labels):
+    """
+    Time a block as `stage`, recording it in the stage_seconds histogram.
+
+    Yields a dict the block can fill with attributes (tokens, items, bytes...)
+    that are kept with the span in the active trace.
+    """
+    attrs = {}
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except GeneratorExit:
+        # A consumer stopped iterating a generator that was inside the span
+        raise
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("stage_seconds", elapsed, help="Time spent per pipeline stage", stage=stage, status=status, **labels)
+        spans = _trace.get()
+        if spans is not None:
+            spans.append({"stage": stage, **labels, "seconds": round(elapsed, 4), "status": status, **attrs})
+
+
+def traced(stage):
+    """Decorator timing each call of an async function as span(stage, name=<function name>)"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(stage, name=func.__name__):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def gemini_cost(input_tokens, output_tokens):
+    """Estimated USD cost of a number of Gemini tokens"""
+    return (input_tokens * GEMINI_INPUT_COST_PER_M + output_tokens * GEMINI_OUTPUT_COST_PER_M) / 1e6
+
+
+def record_gemini_usage(input_tokens, output_tokens, **labels):
+    increment("gemini_input_tokens_total", input_tokens, help="Gemini prompt tokens", **labels)
+    increment("gemini_output_tokens_total", output_tokens, help="Gemini output tokens", **labels)
+    increment("gemini_cost_usd_total", gemini_cost(input_tokens, output_tokens),
+              help="Estimated Gemini spend", **labels)
+
+
+def record_pdf(pages, size):
+    increment("pdf_pages_total", pages, help="PDF pages extracted")
+    increment("pdf_bytes_total", size, help="PDF bytes read")
+
+
+def record_actor_items(items, size, **labels):
+    increment("actor_items_total", items, help="Dataset items read from actor runs", **labels)
+    increment("actor_bytes_total", size, help="JSON bytes of dataset items read from actor runs", **labels)
+    if APIFY_COST_PER_1K_ITEMS:
+        increment("actor_cost_usd_total", items * APIFY_COST_PER_1K_ITEMS / 1000,
+                  help="Estimated Apify spend", **labels)
+
+
+def summarize_spans(spans):
+    """Aggregate a trace into one row per stage: calls, total/max seconds and summed numeric attributes"""
+    rows = {}
+    for entry in spans:
+        label = entry["stage"] + "".join(f" [{entry[key]}]" for key in ("source", "kind") if key in entry)
+        row = rows.setdefault(label, {"stage": label, "calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+        row["calls"] += 1
+        row["seconds"] += entry["seconds"]
+        row["max_seconds"] = max(row["max_seconds"], entry["seconds"])
+        for key, value in entry.items():
+            if key not in ("seconds", "calls") and isinstance(value, (int, float)) and not isinstance(value, bool):
+                row[key] = row.get(key, 0) + value
+    for row in rows.values():
+        row["seconds"] = round(row["seconds"], 3)
+        row["max_seconds"] = round(row["max_seconds"], 3)
+    return sorted(rows.values(), key=lambda row: -row["seconds"])
+
+
+def to_json():
+    """Snapshot of all counters and histograms"""
+    with _lock:
+        counters = [{"name": name, "labels": dict(labels), "value": round(value, 6)}
+                    for (name, labels), value in sorted(_counters.items())]
+        histograms = []
+        for (name, labels), values in sorted(_histograms.items()):
+            count, total = values[-1], values[-2]
+            histograms.append({"name": name, "labels": dict(labels), "count": count,
+                               "sum_seconds": round(total, 6),
+                               "mean_seconds": round(total / count, 6) if count else None})
+    return {"counters": counters, "histograms": histograms}
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def to_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        by_name = defaultdict(list)
+        for (name, labels), value in _counters.items():
+            by_name[name].append((labels, value))
+        for name in sorted(by_name):
+            metric = METRIC_PREFIX + name
+            if name in _help:
+                lines.append(f"# HELP {metric} {_help[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{_format_labels(labels)} {value:g}" for labels, value in sorted(by_name[name]))
+
+        by_name = defaultdict(list)
+        for (name, labels), values in _histograms.items():
+            by_name[name].append((labels, values))
+        for name in sorted(by_name):
+            metric = METRIC_PREFIX + name
+            if name in _help:
+                lines.append(f"# HELP {metric} {_help[name]}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, values in sorted(by_name[name]):
+                for bound, count in zip(_BUCKETS, values):
+                    lines.append(f"{metric}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {count}")
+                lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {values[-1]}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {values[-2]:g}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {values[-1]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+from src.metrics import record_pdf, span
+
+load_dotenv()
+
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_MB", "20")) * 1024 * 1024
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "100000"))
+# Documents with at least this many pages are extracted across a process pool
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+# Processes in that pool
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+
+# Lines within this many lines of the top/bottom of a page are header/footer candidates
+_EDGE_LINES = 3
+_PAGE_NUMBER = re.compile(r"(page\s*)?\d+(\s*(of|/)\s*\d+)?|-\s*\d+\s*-")
+
+
+def _open_pdf(data):
+    # PyMuPDF is imported on first use so processes that never parse PDFs skip its load time
+    import fitz  # PyMuPDF
+
+    return fitz.open(stream=data, filetype="pdf")
+
+
+def _read_pdf_bytes(source, max_bytes=PDF_MAX_BYTES):
+    """Read a path, bytes or file-like upload, refusing anything over max_bytes"""
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    elif isinstance(source, (str, os.PathLike)):
+        if os.path.getsize(source) > max_bytes:
+            raise ValueError(f"❌ PDF is larger than {max_bytes // (1024 * 1024)} MB")
+        with open(source, "rb") as f:
+            data = f.read()
+    else:
+        # Read one byte past the limit so oversized uploads are rejected without reading them whole
+        data = source.read(max_bytes + 1)
+
+    if len(data) > max_bytes:
+        raise ValueError(f"❌ PDF is larger than {max_bytes // (1024 * 1024)} MB")
+    return data
+
+
+def iter_pdf_pages(source, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """Yield the text of each page in turn, stopping at max_pages pages or max_chars characters"""
+    data = _read_pdf_bytes(source)
+    with _open_pdf(data) as doc:
+        remaining = max_chars
+        for page_number in range(min(doc.page_count, max_pages)):
+            if remaining <= 0:
+                break
+            text = doc.load_page(page_number).get_text()[:remaining]
+            remaining -= len(text)
+            yield text
+
+
+def _extract_page_range(data, start, stop):
+    with _open_pdf(data) as doc:
+        return [doc.load_page(page_number).get_text() for page_number in range(start, stop)]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Process pool shared by every extraction, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn rather than fork: the MCP server and Streamlit hosts are multithreaded
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _extract_pages_parallel(data, page_count, workers):
+    chunk = -(-page_count // workers)
+    ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+    pool = _get_pool()
+    try:
+        futures = [pool.submit(_extract_page_range, data, start, stop) for start, stop in ranges]
+        return [text for future in futures for text in future.result()]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time and extract this one in-process
+        global _pool
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        return _extract_page_range(data, 0, page_count)
+
+
+def strip_repeated_lines(pages, min_ratio=0.6):
+    """Drop header/footer lines that repeat near the top or bottom of most pages"""
+    if len(pages) < 3:
+        return pages
+
+    def signature(line):
+        # Page numbers differ from page to page, so they all share one signature
+        line = line.strip().lower()
+        return "<page-number>" if _PAGE_NUMBER.fullmatch(line) else line
+
+    page_lines = [page.splitlines() for page in pages]
+    counts = Counter()
+    for lines in page_lines:
+        edges = lines[:_EDGE_LINES] + lines[-_EDGE_LINES:]
+        counts.update({signature(line) for line in edges if line.strip()})
+
+    repeated = {sig for sig, count in counts.items() if count >= min_ratio * len(pages)}
+    if not repeated:
+        return pages
+
+    stripped = []
+    for lines in page_lines:
+        edge = set(range(_EDGE_LINES)) | set(range(len(lines) - _EDGE_LINES, len(lines)))
+        kept = [
+            line for i, line in enumerate(lines)
+            if not (i in edge and signature(line) in repeated)
+        ]
+        stripped.append("\n".join(kept) + "\n")
+    return stripped
+
+
+def extract_text_from_pdf(uploaded_file, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS,
+                          workers=None, strip_headers=True):
+    """
+    Extract text from an uploaded PDF file (file-like object, bytes or path).
+
+    Large documents are split across a shared process pool; pass workers=1 to
+    stay in-process. Repeated headers and footers are removed unless
+    strip_headers=False, and max_chars applies to the text left after that,
+    so both paths return the same text.
+    """
+    with span("pdf_extract") as attrs:
+        data = _read_pdf_bytes(uploaded_file)
+        with _open_pdf(data) as doc:
+            page_count = min(doc.page_count, max_pages)
+
+        if workers is None:
+            workers = PDF_WORKERS if page_count >= PDF_PARALLEL_MIN_PAGES else 1
+        if workers > 1 and page_count > 1:
+            pages = _extract_pages_parallel(data, page_count, min(workers, PDF_WORKERS, page_count))
+        else:
+            pages = _extract_page_range(data, 0, page_count)
+
+        if strip_headers:
+            pages = strip_repeated_lines(pages)
+        text = "".join(pages)[:max_chars]
+        attrs.update(pages=page_count, bytes=len(data), chars=len(text))
+        record_pdf(page_count, len(data))
+    return text
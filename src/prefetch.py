@@ -0,0 +1,209 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from src.job_api import add_query_listener, refresh_jobs
+from src.job_cache import job_cache, job_cache_key
+from src.metrics import increment
+from src.resilience import deadline
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Set PREFETCH_ENABLED=true to have app.py and mcp-server.py refresh popular searches in the background.
+# Off by default, since every refresh is a paid Apify actor run (up to PREFETCH_BUDGET_RUNS per window)
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+# Seconds between scheduling passes
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "60"))
+# Actor runs the scheduler keeps in flight at once
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+# A search is kept warm once it has been run this many times, until unused for PREFETCH_HALF_LIFE seconds;
+# popularity (for priority) halves every PREFETCH_HALF_LIFE seconds
+PREFETCH_MIN_HITS = int(os.getenv("PREFETCH_MIN_HITS", "2"))
+PREFETCH_HALF_LIFE = float(os.getenv("PREFETCH_HALF_LIFE", str(24 * 3600)))
+PREFETCH_MAX_QUERIES = int(os.getenv("PREFETCH_MAX_QUERIES", "100"))
+# Refresh a cached search once it is this fraction of the way to its job cache TTL
+PREFETCH_REFRESH_AT = float(os.getenv("PREFETCH_REFRESH_AT", "0.8"))
+# Spend budget per process: actor runs and dataset items per PREFETCH_BUDGET_WINDOW seconds
+PREFETCH_BUDGET_RUNS = int(os.getenv("PREFETCH_BUDGET_RUNS", "20"))
+PREFETCH_BUDGET_ITEMS = int(os.getenv("PREFETCH_BUDGET_ITEMS", "1200"))
+PREFETCH_BUDGET_WINDOW = float(os.getenv("PREFETCH_BUDGET_WINDOW", "3600"))
+# Time budget for one background refresh
+PREFETCH_DEADLINE = float(os.getenv("PREFETCH_DEADLINE", "600"))
+
+
+class PrefetchScheduler:
+    """
+    Keeps the most popular searches warm in the job cache.
+
+    Interactive fetches are counted per normalized (source, keywords,
+    location, rows), with an exponentially decayed popularity. Every
+    `interval` seconds, searches run at least `min_hits` times and used within
+    the last `half_life` that are close to expiring (or already gone) are
+    refreshed in the background, most popular and stalest first, with at most `concurrency` actor runs in flight and no more runs
+    or items per budget window than allowed.
+
+    The job cache, popularity and budget all live in this process, so every
+    HTTP worker that starts a scheduler keeps its own searches warm and
+    spends its own budget.
+    """
+
+    def __init__(self, interval=PREFETCH_INTERVAL, concurrency=PREFETCH_CONCURRENCY, min_hits=PREFETCH_MIN_HITS,
+                 half_life=PREFETCH_HALF_LIFE, max_queries=PREFETCH_MAX_QUERIES, refresh_at=PREFETCH_REFRESH_AT,
+                 budget_runs=PREFETCH_BUDGET_RUNS, budget_items=PREFETCH_BUDGET_ITEMS,
+                 budget_window=PREFETCH_BUDGET_WINDOW):
+        self.interval = interval
+        self.concurrency = concurrency
+        self.min_hits = min_hits
+        self.half_life = half_life
+        self.max_queries = max_queries
+        self.refresh_at = refresh_at
+        self.budget_runs = budget_runs
+        self.budget_items = budget_items
+        self.budget_window = budget_window
+        self._queries = {}  # cache key -> query state
+        self._inflight = set()
+        self._spent = deque()  # (started_at, items) of runs inside the budget window
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="prefetch")
+        self._counters = {"runs": 0, "failures": 0, "skipped_budget": 0}
+
+    def _popularity(self, query, now):
+        return query["popularity"] * 0.5 ** ((now - query["seen_at"]) / self.half_life)
+
+    def record(self, source, search_query, location, rows):
+        """Count one interactive search"""
+        now = time.time()
+        key = job_cache_key(source, search_query, location, rows)
+        with self._lock:
+            query = self._queries.get(key)
+            if query is None:
+                query = self._queries[key] = {"args": (source, search_query, location, rows), "hits": 0,
+                                              "popularity": 0.0, "seen_at": now, "attempted_at": 0.0,
+                                              "failures": 0}
+            query["hits"] += 1
+            query["popularity"] = self._popularity(query, now) + 1
+            query["seen_at"] = now
+            if len(self._queries) > self.max_queries:
+                coldest = min(self._queries, key=lambda k: self._popularity(self._queries[k], now))
+                del self._queries[coldest]
+
+    def _age(self, key, now):
+        """Seconds since the search was last fetched, or None if it isn't cached"""
+        entry = job_cache.peek(key)
+        return now - entry[0] if entry is not None else None
+
+    def due(self, now=None):
+        """(priority, key) for the searches that should be refreshed, highest priority first"""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            for key, query in self._queries.items():
+                # Failing searches back off exponentially instead of being retried every pass
+                backoff = self.interval * 2 ** min(query["failures"], 6) if query["failures"] else 0
+                if (key in self._inflight or query["hits"] < self.min_hits
+                        or now - query["seen_at"] > self.half_life or now - query["attempted_at"] < backoff):
+                    continue
+                age = self._age(key, now)
+                if age is not None and age < self.refresh_at * job_cache.ttl:
+                    continue
+                staleness = 2.0 if age is None else min(age / job_cache.ttl, 2.0)
+                due.append((self._popularity(query, now) * staleness, key))
+        return sorted(due, reverse=True)
+
+    def _within_budget(self, rows, now):
+        while self._spent and now - self._spent[0][0] > self.budget_window:
+            self._spent.popleft()
+        runs = len(self._spent)
+        items = sum(spent for _, spent in self._spent)
+        return runs < self.budget_runs and items + rows <= self.budget_items
+
+    def tick(self):
+        """Start refreshes for the most urgent searches that fit in the free slots and the budget"""
+        now = time.time()
+        for _, key in self.due(now):
+            with self._lock:
+                if len(self._inflight) >= self.concurrency:
+                    return
+                query = self._queries.get(key)
+                if query is None or key in self._inflight:
+                    continue
+                rows = query["args"][3]
+                if not self._within_budget(rows, now):
+                    self._counters["skipped_budget"] += 1
+                    continue
+                self._spent.append((now, rows))
+                self._inflight.add(key)
+                query["attempted_at"] = now
+            self._pool.submit(self._refresh, key, query)
+
+    def _refresh(self, key, query):
+        source = query["args"][0]
+        try:
+            with deadline(PREFETCH_DEADLINE):
+                jobs = refresh_jobs(*query["args"])
+            query["failures"] = 0
+            self._counters["runs"] += 1
+            increment("prefetch_runs_total", help="Background refreshes of popular searches", source=source,
+                      status="ok")
+            logger.info("Prefetched %d %s jobs for %r", len(jobs), source, query["args"][1])
+        except Exception:
+            query["failures"] += 1
+            self._counters["failures"] += 1
+            increment("prefetch_runs_total", help="Background refreshes of popular searches", source=source,
+                      status="error")
+            logger.warning("Prefetch of %s jobs for %r failed", source, query["args"][1], exc_info=True)
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Prefetch pass failed")
+
+    def start(self):
+        """Start the background scheduling loop (once per process)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="prefetch-scheduler", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        """Counters, budget use and the tracked searches by popularity"""
+        now = time.time()
+        with self._lock:
+            self._within_budget(0, now)
+            queries = sorted(
+                ({"source": query["args"][0], "keywords": query["args"][1], "location": query["args"][2],
+                  "rows": query["args"][3], "hits": query["hits"],
+                  "popularity": round(self._popularity(query, now), 2),
+                  "failures": query["failures"], "inflight": key in self._inflight}
+                 for key, query in self._queries.items()),
+                key=lambda query: -query["popularity"],
+            )
+            budget = {"runs": len(self._spent), "max_runs": self.budget_runs,
+                      "items": sum(spent for _, spent in self._spent), "max_items": self.budget_items,
+                      "window_seconds": self.budget_window}
+            running = self._thread is not None and self._thread.is_alive()
+        for query in queries:
+            age = self._age(job_cache_key(query["source"], query["keywords"], query["location"], query["rows"]), now)
+            query["age_seconds"] = round(age) if age is not None else None
+        return {"running": running, **self._counters, "budget": budget, "queries": queries}
+
+
+# Shared scheduler; it sees every interactive search, but only refreshes after start()
+prefetch_scheduler = PrefetchScheduler()
+add_query_listener(prefetch_scheduler.record)
@@ -0,0 +1,142 @@
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from src.executor import run_actor_blocking
+from src.job_api import JOB_SOURCES, _resolve_sources
+from src.ranking import tokenize
+from src.resilience import deadline
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Most distinct queries taken from one keyword list (the LLM lists the best ones first)
+PLANNER_MAX_QUERIES = int(os.getenv("PLANNER_MAX_QUERIES", "4"))
+# Actor runs one request may start, across all queries and sources
+PLANNER_MAX_RUNS = int(os.getenv("PLANNER_MAX_RUNS", "6"))
+# Actor runs in flight at once for one request
+PLANNER_WORKERS = int(os.getenv("PLANNER_WORKERS", "4"))
+# Smallest per-run row count when a source's rows are split across queries
+PLANNER_MIN_ROWS = int(os.getenv("PLANNER_MIN_ROWS", "10"))
+
+# Spellings that mean the same thing to a job board, mapped to one canonical word
+_CANONICAL = {
+    "developer": "engineer", "developers": "engineer", "dev": "engineer", "devs": "engineer",
+    "programmer": "engineer", "eng": "engineer", "engg": "engineer", "engineers": "engineer",
+    "sde": "software engineer", "swe": "software engineer",
+    "mgr": "manager", "ml": "machine learning", "ai": "artificial intelligence",
+    "js": "javascript", "ts": "typescript", "k8s": "kubernetes", "golang": "go",
+    "frontend": "front end", "backend": "back end", "fullstack": "full stack",
+    "analytics": "analyst", "scientists": "scientist", "analysts": "analyst",
+}
+# Seniority words don't change which postings a board returns much, so they don't make a query distinct
+_MODIFIERS = frozenset({"senior", "sr", "junior", "jr", "lead", "principal", "staff", "associate", "mid", "level"})
+_SEPARATORS = re.compile(r"[,;|\n]+")
+
+
+def query_key(query):
+    """Order-insensitive key that is equal for near-synonymous queries"""
+    words = []
+    for token in tokenize(query.replace("-", " ")):
+        words.extend(_CANONICAL.get(token, token).split())
+    return frozenset(word for word in words if word not in _MODIFIERS)
+
+
+def plan_queries(keywords, max_queries=PLANNER_MAX_QUERIES):
+    """Split a keyword list into distinct search queries, keeping the first spelling of each"""
+    queries = {}
+    for part in _SEPARATORS.split(keywords):
+        query = re.sub(r"\s+", " ", part.strip(" \t\"'`*-•.")).strip()
+        key = query_key(query)
+        if key and key not in queries:
+            queries[key] = query
+    return list(queries.values())[:max_queries]
+
+
+def plan_runs(keywords, rows=60, sources=None, max_runs=PLANNER_MAX_RUNS, max_queries=PLANNER_MAX_QUERIES):
+    """
+    (source, query, rows) for every actor run to start, best queries first.
+
+    Each source's `rows` are split across the queries, so a request reads
+    about as many items as one unplanned search while covering more titles,
+    and no more than `max_runs` runs are planned. Nothing is planned when
+    `rows` or `max_runs` is below 1.
+    """
+    names = _resolve_sources(sources)
+    if rows < 1 or max_runs < 1:
+        return []
+    queries = plan_queries(keywords, max_queries)
+    if not queries:
+        raise ValueError("❌ No search keywords given")
+    queries = queries[:max(1, max_runs // max(1, len(names)))]
+    per_run = max(PLANNER_MIN_ROWS, math.ceil(rows / len(queries)))
+    runs = [(source, query, min(rows, per_run)) for query in queries for source in names]
+    return runs[:max_runs]
+
+
+def fetch_planned_jobs(runs, location="india", workers=PLANNER_WORKERS):
+    """
+    Start planned runs on a bounded pool, yielding (source, query, jobs) as each finishes.
+
+    A failed run is logged and skipped; the last error is raised only if every run failed.
+    """
+    if not runs:
+        return
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(workers, len(runs)), thread_name_prefix="planner") as pool:
+        futures = {
+            # Runs go through the job cache and inherit the request deadline
+            pool.submit(contextvars.copy_context().run, JOB_SOURCES[source], query, location, rows): (source, query)
+            for source, query, rows in runs
+        }
+        for future in as_completed(futures):
+            source, query = futures[future]
+            try:
+                jobs = future.result()
+            except Exception as exc:
+                logger.warning("%s search for %r failed: %s", source, query, exc)
+                errors.append(exc)
+                continue
+            yield source, query, jobs
+    if len(errors) == len(runs):
+        raise errors[-1]
+
+
+async def fetch_planned_jobs_async(runs, location="india", workers=PLANNER_WORKERS):
+    """
+    Async counterpart of fetch_planned_jobs for use inside the MCP event loop.
+
+    Each run gets its own child deadline, cancelled when the caller stops
+    iterating (or is cancelled), so actor runs still in flight are aborted
+    instead of being paid for in the background.
+    """
+    semaphore = asyncio.Semaphore(workers)
+    run_deadlines = []
+
+    async def run(source, query, rows):
+        async with semaphore:
+            with deadline(None) as run_deadline:
+                run_deadlines.append(run_deadline)
+                return source, query, await run_actor_blocking(JOB_SOURCES[source], query, location, rows)
+
+    tasks = [asyncio.ensure_future(run(*planned)) for planned in runs]
+    errors = []
+    try:
+        for task in asyncio.as_completed(tasks):
+            try:
+                yield await task
+            except Exception as exc:
+                logger.warning("Planned search failed: %s", exc)
+                errors.append(exc)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for run_deadline in run_deadlines:
+            run_deadline.cancel()
+    if tasks and len(errors) == len(tasks):
+        raise errors[-1]
@@ -0,0 +1,221 @@
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dotenv import load_dotenv
+from src.metrics import span
+from src.skills import extract_skills
+
+load_dotenv()
+
+# Keeps tokens such as "c++", "c#", "node.js" and ".net" intact
+_TOKEN = re.compile(r"[a-z0-9.+#]*[a-z0-9+#]")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our the their this to was were
+will with you your we us i my me who what which job role work working team teams experience years
+year etc using use used based including within across per via new
+""".split())
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+# A posting's BM25 score is scaled by (1 + RANK_SKILL_WEIGHT * share of its taxonomy skills the resume has)
+RANK_SKILL_WEIGHT = float(os.getenv("RANK_SKILL_WEIGHT", "0.5"))
+# Postings whose tokenized terms and skills are kept, so re-ranking a set that grew (or the same set again)
+# only tokenizes postings not seen before
+RANK_CACHE_JOBS = int(os.getenv("RANK_CACHE_JOBS", "50000"))
+# Distinct terms the shared vocabulary may reach before it (and the cached postings) are dropped
+RANK_CACHE_TERMS = int(os.getenv("RANK_CACHE_TERMS", "1000000"))
+
+
+def tokenize(text):
+    """Lowercased word tokens with stopwords and bare numbers removed"""
+    return [
+        token for token in _TOKEN.findall(text.lower())
+        if token not in STOPWORDS and not token.isdigit() and len(token) > 1
+    ]
+
+
+def job_text(job):
+    """Searchable text for a JobRecord; the title is repeated so it weighs more"""
+    return " ".join((job.title, job.title, job.company, job.skills, job.description))
+
+
+class FeatureCache:
+    """
+    Per-posting term counts (as column IDs in one shared, growing vocabulary)
+    and taxonomy skills, kept for the most recently ranked postings so indexes
+    over them are assembled without tokenizing or scanning for skills again.
+    """
+
+    def __init__(self, max_jobs=RANK_CACHE_JOBS, max_terms=RANK_CACHE_TERMS):
+        self.max_jobs = max_jobs
+        self.max_terms = max_terms
+        self.vocabulary = {}
+        self._features = OrderedDict()  # (job id, text hash) -> (term ids, counts, skills)
+        self._lock = threading.Lock()
+
+    def features(self, jobs):
+        """(vocabulary, [(term ids, counts, skills)] per job, number of vocabulary columns in use)"""
+        # numpy is imported on first use to keep server startup fast
+        import numpy as np
+
+        texts = [job_text(job) for job in jobs]
+        keys = [(job.id, hash(text)) for job, text in zip(jobs, texts)]
+        with self._lock:
+            if len(self.vocabulary) > self.max_terms:
+                # A fresh dict, so indexes built on the old vocabulary keep working
+                self.vocabulary = {}
+                self._features.clear()
+            vocabulary = self.vocabulary
+            features = [self._features.get(key) for key in keys]
+            for key, cached in zip(keys, features):
+                if cached is not None:
+                    self._features.move_to_end(key)
+
+        # Tokenizing and skill extraction are the slow part, so they run outside the lock
+        missing = [i for i, cached in enumerate(features) if cached is None]
+        computed = {
+            i: (Counter(tokenize(texts[i])), extract_skills(f"{jobs[i].title} {jobs[i].skills} {jobs[i].description}"))
+            for i in missing
+        }
+
+        with self._lock:
+            for i, (term_counts, skills) in computed.items():
+                ids = np.fromiter((vocabulary.setdefault(term, len(vocabulary)) for term in term_counts),
+                                  dtype=np.int32, count=len(term_counts))
+                features[i] = (ids, np.fromiter(term_counts.values(), dtype=np.float32, count=len(term_counts)),
+                               skills)
+                if vocabulary is self.vocabulary:
+                    self._features[keys[i]] = features[i]
+            while len(self._features) > self.max_jobs:
+                self._features.popitem(last=False)
+            return vocabulary, features, len(vocabulary)
+
+
+_feature_cache = FeatureCache()
+
+
+def build_term_matrix(features, n_terms):
+    """Sparse (documents x terms) term-frequency matrix from per-document (term ids, counts)"""
+    # numpy and scipy are imported on first use to keep server startup fast
+    import numpy as np
+    from scipy import sparse
+
+    lengths = np.fromiter((len(ids) for ids, _, _ in features), dtype=np.int64, count=len(features))
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    indices = np.concatenate([ids for ids, _, _ in features]) if features else np.empty(0, dtype=np.int32)
+    data = np.concatenate([counts for _, counts, _ in features]) if features else np.empty(0, dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(features), n_terms))
+
+
+def bm25_contributions(term_matrix, query_columns, k1=BM25_K1, b=BM25_B):
+    """Sparse (documents x query terms) matrix of per-term BM25 scores"""
+    import numpy as np
+    from scipy import sparse
+
+    n_docs = term_matrix.shape[0]
+    doc_lengths = np.asarray(term_matrix.sum(axis=1)).ravel()
+    avg_length = doc_lengths.mean() if n_docs else 0.0
+
+    tf = term_matrix[:, query_columns].tocoo()
+    df = np.bincount(tf.col, minlength=len(query_columns))
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+    norm = k1 * (1 - b + b * doc_lengths[tf.row] / max(avg_length, 1e-9))
+    scores = idf[tf.col] * tf.data * (k1 + 1) / (tf.data + norm)
+    return sparse.csr_matrix((scores, (tf.row, tf.col)), shape=tf.shape)
+
+
+class JobIndex:
+    """BM25 index over a fixed list of job postings; build once, then score many resumes"""
+
+    def __init__(self, jobs, cache=None):
+        self.jobs = list(jobs)
+        self.vocabulary, features, self.n_terms = (cache or FeatureCache(max_jobs=0)).features(self.jobs)
+        self.term_matrix = build_term_matrix(features, self.n_terms)
+        self.job_skills = [skills for _, _, skills in features]
+
+    def _skill_match(self, index, resume_skills):
+        skills = self.job_skills[index]
+        return {
+            "matched_skills": [skill for skill in skills if skill in resume_skills],
+            "missing_skills": [skill for skill in skills if skill not in resume_skills],
+        }
+
+    def rank(self, resume_text, top_k=20, explain_terms=5, skill_weight=RANK_SKILL_WEIGHT):
+        """
+        Top-k postings for a resume, each as a dict with the job, its score
+        (BM25, boosted by the share of the posting's skills the resume has), the
+        resume terms that contributed most to it and the matched/missing skills.
+        """
+        if not self.jobs or top_k <= 0:
+            return []
+        import numpy as np
+
+        resume_skills = set(extract_skills(resume_text))
+        # The vocabulary may be shared and have grown since this index was built
+        query_counts = Counter(token for token in tokenize(resume_text)
+                               if self.vocabulary.get(token, self.n_terms) < self.n_terms)
+        if not query_counts:
+            return [{"job": job, "score": 0.0, "matched_terms": {}, **self._skill_match(index, resume_skills)}
+                    for index, job in enumerate(self.jobs[:top_k])]
+
+        terms = list(query_counts)
+        columns = np.fromiter((self.vocabulary[term] for term in terms), dtype=np.int32, count=len(terms))
+        # Resume terms mentioned repeatedly matter more, with diminishing returns
+        weights = np.fromiter((1 + math.log(query_counts[term]) for term in terms),
+                              dtype=np.float64, count=len(terms))
+
+        contributions = bm25_contributions(self.term_matrix, columns).multiply(weights).tocsr()
+        scores = np.asarray(contributions.sum(axis=1)).ravel()
+        if skill_weight:
+            coverage = np.fromiter(
+                (len(resume_skills.intersection(skills)) / len(skills) if skills else 0.0 for skills in self.job_skills),
+                dtype=np.float64, count=len(self.jobs),
+            )
+            scores = scores * (1 + skill_weight * coverage)
+
+        top_k = min(top_k, len(self.jobs))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for index in top:
+            row = contributions.getrow(index)
+            best = np.argsort(-row.data)[:explain_terms]
+            results.append({
+                "job": self.jobs[index],
+                "score": round(float(scores[index]), 4),
+                "matched_terms": {terms[row.indices[i]]: round(float(row.data[i]), 4) for i in best},
+                **self._skill_match(index, resume_skills),
+            })
+        return results
+
+
+_index_cache = OrderedDict()  # tuple of (job id, text hash) -> JobIndex
+_index_cache_lock = threading.Lock()
+_INDEX_CACHE_SIZE = 8
+
+
+def get_job_index(jobs):
+    """JobIndex over jobs, reused when the same postings are ranked again"""
+    key = tuple((job.id, hash(job_text(job))) for job in jobs)
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+    index = JobIndex(jobs, _feature_cache)
+    with _index_cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def rank_jobs(resume_text, jobs, top_k=20, explain_terms=5):
+    """Rank job postings against a resume with BM25 and taxonomy skills, without any LLM call"""
+    with span("rank_jobs") as attrs:
+        attrs["jobs"] = len(jobs)
+        return get_job_index(jobs).rank(resume_text, top_k, explain_terms)
@@ -0,0 +1,85 @@
+import hashlib
+from dataclasses import asdict, dataclass, field, fields
+
+# Long descriptions are only used for ranking/dedup/embedding, so keep them bounded
+JOB_DESCRIPTION_MAX_CHARS = 4000
+
+# Raw actor field names per source, in order of preference
+FIELD_MAP = {
+    "linkedin": {
+        "title": ("title",),
+        "company": ("companyName",),
+        "location": ("location",),
+        "url": ("link", "jobUrl", "url"),
+        "description": ("descriptionText", "description"),
+        "skills": ("skills",),
+        "posted_at": ("postedAt", "publishedAt"),
+    },
+    "naukri": {
+        "title": ("title",),
+        "company": ("companyName",),
+        "location": ("location",),
+        "url": ("url", "jdURL", "jobUrl"),
+        "description": ("jobDescription", "description"),
+        "skills": ("tagsAndSkills", "skills"),
+        "posted_at": ("createdDate", "postedAt"),
+    },
+}
+# Used for sources without their own mapping (and for client-supplied dicts)
+_ANY_SOURCE = {
+    name: tuple(dict.fromkeys(key for mapping in FIELD_MAP.values() for key in mapping[name]))
+    for name in FIELD_MAP["linkedin"]
+}
+
+
+def _first(raw, keys):
+    for key in keys:
+        value = raw.get(key)
+        if value:
+            return " ".join(map(str, value)) if isinstance(value, list) else str(value)
+    return ""
+
+
+@dataclass(slots=True)
+class JobRecord:
+    """Compact job posting with the same fields for every source"""
+
+    id: str
+    source: str
+    title: str
+    company: str
+    location: str
+    url: str
+    description: str = ""
+    skills: str = ""
+    posted_at: str = ""
+    sources: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_raw(cls, source, raw):
+        """Project a raw actor item onto the fields we use, dropping everything else"""
+        mapping = FIELD_MAP.get(source, _ANY_SOURCE)
+        values = {name: _first(raw, keys) for name, keys in mapping.items()}
+        values["description"] = values["description"][:JOB_DESCRIPTION_MAX_CHARS]
+        return cls(id=make_job_id(values), source=source, sources=[source], **values)
+
+    @classmethod
+    def coerce(cls, job):
+        """Accept a JobRecord, a dict from to_dict(), or a raw actor item"""
+        if isinstance(job, cls):
+            return job
+        if "id" in job and "company" in job:
+            names = {f.name for f in fields(cls)}
+            return cls(**{key: value for key, value in job.items() if key in names})
+        return cls.from_raw(job.get("source", ""), job)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def make_job_id(values):
+    """Stable ID for a posting: its URL when present, otherwise a hash of title/company/location"""
+    if values.get("url"):
+        return values["url"]
+    key = "|".join(values.get(name, "").lower() for name in ("title", "company", "location"))
+    return hashlib.sha1(key.encode()).hexdigest()
@@ -0,0 +1,230 @@
+import contextvars
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from src.metrics import increment
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Default time budget in seconds for one MCP tool call or Streamlit pipeline stage (0 = none)
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "120"))
+# Retries after the first attempt, with full-jitter exponential backoff
+CALL_RETRIES = int(os.getenv("CALL_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+
+# Latency samples kept per (call, outcome) for percentiles
+_LATENCY_SAMPLES = 1000
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed (or its attempt was cancelled) before the call finished"""
+
+
+class Deadline:
+    """
+    Absolute deadline for the current request, shared by everything it calls.
+
+    A child deadline never outlives its parent and can be cancelled on its own,
+    which is how the losing attempt of a hedged call is told to stop.
+    """
+
+    def __init__(self, seconds=None, parent=None):
+        self.parent = parent
+        expires = [time.monotonic() + seconds] if seconds is not None else []
+        if parent is not None and parent.expires_at is not None:
+            expires.append(parent.expires_at)
+        self.expires_at = min(expires) if expires else None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled or (self.parent is not None and self.parent.cancelled)
+
+    def remaining(self):
+        """Seconds left, or None when unbounded"""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds=REQUEST_DEADLINE):
+    """Bound everything called inside the block (including worker threads started with a copied context)"""
+    token = _current.set(Deadline(seconds or None, _current.get()))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def with_deadline(seconds=REQUEST_DEADLINE):
+    """Decorator running an async function under deadline(seconds)"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with deadline(seconds):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def remaining():
+    """Seconds left before the current deadline, or None if there is none"""
+    current = _current.get()
+    return current.remaining() if current is not None else None
+
+
+def check_deadline():
+    if remaining() == 0:
+        raise DeadlineExceeded("❌ Request deadline exceeded")
+
+
+# Outcome counts and latencies per call name, e.g. {("gemini", "retried"): 3}
+_outcomes = Counter()
+_latencies = defaultdict(lambda: deque(maxlen=_LATENCY_SAMPLES))
+_outcomes_lock = threading.Lock()
+
+
+def record_outcome(name, outcome, elapsed=0.0):
+    """Tag one call with how it ended: ok, retried, hedged, fallback, timeout or error"""
+    with _outcomes_lock:
+        _outcomes[(name, outcome)] += 1
+        _latencies[(name, outcome)].append(elapsed)
+    increment("call_outcomes_total", help="Apify and Gemini calls by outcome", call=name, outcome=outcome)
+    if outcome != "ok":
+        logger.info("%s: %s after %.2fs", name, outcome, elapsed)
+
+
+def outcome_stats():
+    """{call: {outcome: {count, p50_ms, p99_ms}}} for this process"""
+    with _outcomes_lock:
+        snapshot = {key: (count, sorted(_latencies[key])) for key, count in _outcomes.items()}
+    stats = defaultdict(dict)
+    for (name, outcome), (count, samples) in sorted(snapshot.items()):
+        stats[name][outcome] = {
+            "count": count,
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 1),
+        }
+    return dict(stats)
+
+
+def is_retryable(exc):
+    """Client errors (4xx other than 408/429) and bad arguments won't succeed on retry"""
+    if isinstance(exc, (ValueError, TypeError, DeadlineExceeded)):
+        return False
+    status = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status not in (408, 429):
+        return False
+    return True
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# Attempts of hedged calls run here, so the caller can stop waiting for the slow one
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+def _run_attempt(attempt_deadline, func):
+    _current.set(attempt_deadline)
+    return func()
+
+
+def _hedged(func, hedge_after):
+    """
+    Run func, starting a second copy if the first hasn't finished after
+    hedge_after seconds. Returns (result, hedge_won); the losing attempt's
+    deadline is cancelled so cooperative callees stop early.
+    """
+    parent = _current.get()
+    attempts = {}
+
+    def start():
+        attempt_deadline = Deadline(parent=parent)
+        future = _hedge_pool.submit(contextvars.copy_context().run, _run_attempt, attempt_deadline, func)
+        attempts[future] = (len(attempts), attempt_deadline)
+        return future
+
+    pending = {start()}
+    error = None
+    try:
+        while pending:
+            left = remaining()
+            timeout = hedge_after if len(attempts) == 1 else left
+            if left is not None and timeout is not None:
+                timeout = min(timeout, left)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), attempts[future][0] > 0
+                error = future.exception()
+            if not done:
+                if len(attempts) > 1 or remaining() == 0:
+                    raise DeadlineExceeded("❌ Request deadline exceeded")
+                pending.add(start())
+        # Every attempt failed; the retry loop decides whether to go again
+        raise error
+    finally:
+        for _, attempt_deadline in attempts.values():
+            attempt_deadline.cancel()
+
+
+def call_with_retries(name, func, retries=CALL_RETRIES, hedge_after=None):
+    """
+    Call func() under the current deadline, retrying retryable errors with
+    jittered backoff and optionally hedging slow attempts (hedge_after seconds).
+
+    Every call is recorded with an outcome tag (see outcome_stats()). Raises
+    DeadlineExceeded once the deadline passes, or the last error otherwise.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            check_deadline()
+            if hedge_after:
+                result, hedge_won = _hedged(func, hedge_after)
+            else:
+                result, hedge_won = func(), False
+        except Exception as exc:
+            elapsed = time.monotonic() - started
+            if isinstance(exc, DeadlineExceeded) or remaining() == 0:
+                record_outcome(name, "timeout", elapsed)
+                if isinstance(exc, DeadlineExceeded):
+                    raise
+                raise DeadlineExceeded(f"❌ {name} did not finish before the request deadline") from exc
+
+            delay = backoff_delay(attempt)
+            left = remaining()
+            if attempt >= retries or not is_retryable(exc) or (left is not None and delay >= left):
+                record_outcome(name, "error", elapsed)
+                raise
+            logger.warning("%s failed (%s), retrying in %.2fs", name, exc, delay)
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        outcome = "hedged" if hedge_won else "retried" if attempt else "ok"
+        record_outcome(name, outcome, time.monotonic() - started)
+        return result
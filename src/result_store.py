@@ -0,0 +1,149 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dotenv import load_dotenv
+from src.records import JobRecord
+
+load_dotenv()
+
+RESULT_PAGE_SIZE = int(os.getenv("RESULT_PAGE_SIZE", "20"))
+# Larger page sizes asked for by a client are cut down to this
+RESULT_MAX_PAGE_SIZE = int(os.getenv("RESULT_MAX_PAGE_SIZE", "200"))
+RESULT_TTL = int(os.getenv("RESULT_TTL", "1800"))
+RESULT_MAX_SETS = int(os.getenv("RESULT_MAX_SETS", "256"))
+# SQLite file for result sets, so every server worker process can page them; empty keeps them in memory
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "")
+
+
+def encode_cursor(result_id, offset):
+    payload = json.dumps([result_id, offset]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        result_id, offset = json.loads(base64.urlsafe_b64decode(padded))
+        result_id, offset = str(result_id), int(offset)
+    except (ValueError, TypeError):
+        raise ValueError("❌ Invalid cursor") from None
+    if offset < 0:
+        raise ValueError("❌ Invalid cursor")
+    return result_id, offset
+
+
+class ResultStore:
+    """
+    Server-side result sets addressed by ID, so tools can hand out pages and
+    cursors instead of whole result lists. Sets expire after `ttl` seconds and
+    the oldest are dropped beyond `max_sets`.
+    """
+
+    def __init__(self, ttl=RESULT_TTL, max_sets=RESULT_MAX_SETS):
+        self.ttl = ttl
+        self.max_sets = max_sets
+        self._sets = OrderedDict()  # result_id -> (created_at, items)
+        self._lock = threading.Lock()
+
+    def put(self, items):
+        result_id = uuid.uuid4().hex[:16]
+        now = time.time()
+        with self._lock:
+            self._sets[result_id] = (now, tuple(items))
+            while self._sets and (len(self._sets) > self.max_sets
+                                  or now - next(iter(self._sets.values()))[0] > self.ttl):
+                self._sets.popitem(last=False)
+        return result_id
+
+    def get(self, result_id):
+        with self._lock:
+            entry = self._sets.get(result_id)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            raise ValueError("❌ Results expired or unknown; run the search again")
+        return entry[1]
+
+    def page(self, result_id, offset=0, limit=RESULT_PAGE_SIZE):
+        """One page of a result set, with the cursor for the next page (None on the last)"""
+        if offset < 0:
+            raise ValueError("❌ Page offset must not be negative")
+        # Every page makes progress, so following next_cursor always ends
+        limit = min(max(1, limit), RESULT_MAX_PAGE_SIZE)
+        items = self.get(result_id)
+        end = offset + limit
+        return {
+            "result_id": result_id,
+            "total": len(items),
+            "items": [item.to_dict() if hasattr(item, "to_dict") else item for item in items[offset:end]],
+            "next_cursor": encode_cursor(result_id, end) if end < len(items) else None,
+        }
+
+    def paginate(self, items, limit=RESULT_PAGE_SIZE):
+        """Store items and return their first page"""
+        return self.page(self.put(items), 0, limit)
+
+    def next_page(self, cursor, limit=RESULT_PAGE_SIZE):
+        result_id, offset = decode_cursor(cursor)
+        return self.page(result_id, offset, limit)
+
+
+class SharedResultStore(ResultStore):
+    """
+    ResultStore kept in SQLite, so a cursor handed out by one server worker
+    process can be paged by another. Items are stored as JSON and come back
+    as JobRecords.
+    """
+
+    def __init__(self, path, ttl=RESULT_TTL, max_sets=RESULT_MAX_SETS):
+        super().__init__(ttl, max_sets)
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS result_sets (
+                result_id TEXT PRIMARY KEY,
+                items TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS result_sets_created ON result_sets(created_at)")
+
+    def put(self, items):
+        result_id = uuid.uuid4().hex[:16]
+        now = time.time()
+        payload = json.dumps([item.to_dict() if hasattr(item, "to_dict") else item for item in items],
+                             ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("INSERT INTO result_sets VALUES (?, ?, ?)", (result_id, payload, now))
+                self._conn.execute("DELETE FROM result_sets WHERE created_at < ?", (now - self.ttl,))
+                self._conn.execute("""
+                    DELETE FROM result_sets WHERE result_id NOT IN (
+                        SELECT result_id FROM result_sets ORDER BY created_at DESC LIMIT ?
+                    )
+                """, (self.max_sets,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result_id
+
+    def get(self, result_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT items, created_at FROM result_sets WHERE result_id = ?", (result_id,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            raise ValueError("❌ Results expired or unknown; run the search again")
+        return tuple(JobRecord.coerce(item) for item in json.loads(row[0]))
+
+
+# Shared by all MCP sessions in this process (and by all worker processes when RESULT_STORE_PATH is set)
+result_store = SharedResultStore(RESULT_STORE_PATH) if RESULT_STORE_PATH else ResultStore()
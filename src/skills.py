@@ -0,0 +1,213 @@
+import json
+import os
+import re
+from collections import Counter, deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Optional JSON file {"skills": {name: [aliases]}, "titles": {name: [aliases]}} merged over the built-in taxonomy
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH", "")
+
+# Canonical skill -> extra spellings (the canonical name matches too, unless it is ambiguous)
+SKILLS = {
+    # Languages
+    "Python": ("python3",), "Java": ("core java", "java8", "java 8"), "JavaScript": ("js", "es6", "ecmascript"),
+    "TypeScript": (), "C++": ("cpp",), "C#": ("c sharp", "csharp"), "Go": ("golang", "go lang", "go programming"),
+    "Rust": (), "Kotlin": (), "Swift": (), "Scala": (), "Ruby": (), "PHP": (), "R": ("r programming", "r language"),
+    "SQL": ("t-sql", "tsql", "pl/sql", "plsql"), "Bash": ("shell scripting", "shell script"), "MATLAB": (),
+    "Dart": (), "Perl": (), "Solidity": (),
+    # Web and backend
+    "React": ("react.js", "reactjs", "react js"), "Angular": ("angularjs", "angular.js"),
+    "Vue": ("vue.js", "vuejs"), "Next.js": ("nextjs",), "Node.js": ("nodejs", "node js"),
+    "Express.js": ("expressjs",), "Django": (), "Flask": (), "FastAPI": ("fast api",),
+    "Spring Boot": ("springboot", "spring framework", "spring mvc"), ".NET": ("dotnet", "asp.net", ".net core"),
+    "Ruby on Rails": ("rails",), "Laravel": (), "HTML": ("html5",), "CSS": ("css3",), "Tailwind CSS": ("tailwind",),
+    "Redux": (), "GraphQL": (), "REST APIs": ("restful", "rest api", "restful apis", "rest services"), "gRPC": (),
+    "Microservices": ("microservice",), "WebSockets": ("websocket",), "Flutter": (), "React Native": (),
+    "Android": (), "iOS": (),
+    # Data and ML
+    "Machine Learning": ("ml",), "Deep Learning": (), "NLP": ("natural language processing",),
+    "Computer Vision": ("opencv",), "Generative AI": ("genai", "gen ai"), "LLMs": ("llm", "large language models"),
+    "TensorFlow": (), "PyTorch": ("torch",), "Keras": (), "scikit-learn": ("sklearn", "scikit learn"), "Pandas": (),
+    "NumPy": (), "SciPy": (), "Matplotlib": (), "Hugging Face": ("huggingface", "transformers"), "LangChain": (),
+    "MLOps": (), "Statistics": ("statistical analysis",), "Data Analysis": ("data analytics",),
+    "Data Visualization": (), "Power BI": ("powerbi",), "Tableau": (),
+    "Excel": ("ms excel", "advanced excel", "microsoft excel"), "Apache Spark": ("spark", "pyspark"), "Hadoop": (),
+    "Kafka": ("apache kafka",), "Airflow": ("apache airflow",), "dbt": (), "ETL": ("elt", "etl pipelines"),
+    "Data Warehousing": ("data warehouse",), "Snowflake": (), "Databricks": (), "BigQuery": ("big query",),
+    # Databases
+    "PostgreSQL": ("postgres",), "MySQL": (), "MongoDB": ("mongo",), "Redis": (),
+    "Elasticsearch": ("elastic search",), "Cassandra": (), "DynamoDB": (), "Oracle": ("oracle db",), "SQLite": (),
+    # Cloud and DevOps
+    "AWS": ("amazon web services",), "Azure": ("microsoft azure",),
+    "GCP": ("google cloud", "google cloud platform"), "Docker": (), "Kubernetes": ("k8s",), "Terraform": (),
+    "Ansible": (), "Jenkins": (), "GitHub Actions": (),
+    "CI/CD": ("ci cd", "continuous integration", "continuous delivery"), "Linux": ("unix",),
+    "Git": ("github", "gitlab"), "Prometheus": (), "Grafana": (), "Nginx": (), "Serverless": ("aws lambda",),
+    # Practices and other
+    "Agile": ("scrum",), "System Design": (), "Data Structures": ("dsa", "data structures and algorithms"),
+    "Algorithms": (), "Object-Oriented Programming": ("oop", "oops"), "Unit Testing": ("pytest", "junit"),
+    "Selenium": (), "Cybersecurity": ("information security", "cyber security"), "Networking": (), "Blockchain": (),
+    "Figma": (), "UI/UX": ("ui ux", "user experience"), "SEO": (), "Salesforce": (), "SAP": (), "Jira": (),
+    "Product Management": (), "Project Management": ("pmp",), "Communication": ("communication skills",),
+    "Leadership": ("team leadership",),
+}
+
+# Canonical job title -> extra spellings
+TITLES = {
+    "Software Engineer": ("software developer", "sde", "swe", "software development engineer", "programmer"),
+    "Backend Engineer": ("backend developer", "back end developer", "back-end developer", "back end engineer"),
+    "Frontend Engineer": ("frontend developer", "front end developer", "front-end developer", "ui developer"),
+    "Full Stack Developer": ("full stack engineer", "fullstack developer", "full-stack developer", "mern stack developer"),
+    "Python Developer": ("python engineer",), "Java Developer": ("java engineer",),
+    "Mobile Developer": ("android developer", "ios developer", "flutter developer"), "Data Scientist": (),
+    "Data Analyst": ("analytics engineer",), "Data Engineer": ("big data engineer", "etl developer"),
+    "Machine Learning Engineer": ("ml engineer", "ai engineer"),
+    "DevOps Engineer": ("site reliability engineer", "sre", "platform engineer"),
+    "Cloud Engineer": ("cloud architect", "aws engineer"),
+    "QA Engineer": ("test engineer", "sdet", "automation tester"),
+    "Security Engineer": ("cybersecurity analyst", "security analyst"), "Database Administrator": ("dba",),
+    "Solutions Architect": ("software architect", "technical architect"),
+    "Engineering Manager": ("engineering lead",), "Product Manager": (), "Project Manager": (),
+    "UI/UX Designer": ("ui designer", "ux designer", "product designer"),
+    "Embedded Engineer": ("embedded software engineer", "firmware engineer"),
+}
+
+# Names that are also everyday words (or letters), so only their aliases count as a mention
+_AMBIGUOUS = frozenset({"Go", "R", "Excel", "Swift", "Dart"})
+
+# Same shape as the ranking tokenizer, but keeps every word so multi-word names line up
+_TOKEN = re.compile(r"[a-z0-9.+#]*[a-z0-9+#]")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower().replace("/", " / ").replace("-", " "))
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher over word tokens: every pattern occurrence in one
+    pass over the text, in time linear in the number of tokens.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> [(pattern length in tokens, value)]
+        for tokens, value in patterns:
+            state = 0
+            for token in tokens:
+                if token not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][token] = len(self._goto) - 1
+                state = self._goto[state][token]
+            self._output[state].append((len(tokens), value))
+
+        # Breadth-first, so each state's failure link points at an already finished state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                if state:
+                    fallback = self._fail[state]
+                    while fallback and token not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, tokens):
+        """Yield (start, end, value) for every pattern occurrence in a token list"""
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for length, value in self._output[state]:
+                yield position + 1 - length, position + 1, value
+
+
+class SkillMatcher:
+    """Finds taxonomy skills and job titles in free text, preferring the longest match at each position"""
+
+    def __init__(self, skills=SKILLS, titles=TITLES):
+        patterns = []
+        for kind, taxonomy in (("skill", skills), ("title", titles)):
+            for name, aliases in taxonomy.items():
+                for spelling in set(aliases) | ({name} - _AMBIGUOUS):
+                    tokens = tokenize(spelling)
+                    if tokens:
+                        patterns.append((tokens, (kind, name)))
+        self._automaton = AhoCorasick(patterns)
+
+    def matches(self, text):
+        """
+        (kind, canonical name) for each mention, in text order. Mentions of the
+        same kind don't overlap; "Python Developer" is both a title and Python.
+        """
+        found = sorted(self._automaton.find(tokenize(text)), key=lambda match: (match[0], match[0] - match[1]))
+        kept = []
+        ends = {}
+        for start, stop, value in found:
+            if start >= ends.get(value[0], 0):
+                kept.append(value)
+                ends[value[0]] = stop
+        return kept
+
+    def extract(self, text, kind="skill"):
+        """Canonical names of one kind mentioned in text, most frequent first (ties by first mention)"""
+        mentions = Counter(name for found, name in self.matches(text) if found == kind)
+        return [name for name, _ in mentions.most_common()]
+
+
+def load_taxonomy(path=SKILL_TAXONOMY_PATH):
+    skills, titles = dict(SKILLS), dict(TITLES)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            extra = json.load(f)
+        skills.update({name: tuple(aliases) for name, aliases in extra.get("skills", {}).items()})
+        titles.update({name: tuple(aliases) for name, aliases in extra.get("titles", {}).items()})
+    return skills, titles
+
+
+_matcher = None
+
+
+def get_matcher():
+    """Process-wide matcher over the taxonomy, built on first use"""
+    global _matcher
+    if _matcher is None:
+        _matcher = SkillMatcher(*load_taxonomy())
+    return _matcher
+
+
+def extract_skills(text):
+    return get_matcher().extract(text, "skill")
+
+
+def extract_titles(text):
+    return get_matcher().extract(text, "title")
+
+
+def generate_keywords(text, max_titles=3, max_skills=4):
+    """Comma-separated job search keywords from a resume or summary: its job titles, then its top skills"""
+    keywords = extract_titles(text)[:max_titles] + extract_skills(text)[:max_skills]
+    return ", ".join(keywords)
+
+
+def skill_gaps(resume_text, jobs, top_k=10):
+    """
+    Skills the postings ask for that the resume doesn't mention, by how many
+    postings ask for them.
+    """
+    have = set(extract_skills(resume_text))
+    demand = Counter()
+    for job in jobs:
+        demand.update(set(extract_skills(f"{job.title} {job.skills} {job.description}")) - have)
+    return [
+        {"skill": skill, "jobs": count, "share": round(count / len(jobs), 3)}
+        for skill, count in demand.most_common(top_k)
+    ]